@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+'''
+hashing throughput for --hashes, without candidate generation
+
+candidates are generated up front and split into batches,
+then each hash type is timed with a pool of 1, 2, ... processes
+(the pool is started before the timer, like in a long --hashes run)
+'''
+
+import sys
+import time
+import random
+from pathlib import Path
+from os import cpu_count
+from multiprocessing import Pool
+from argparse import ArgumentParser
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.mangler import Mangler
+from lib.hasher import hash_types, _init_worker, _crack_batch
+
+
+def make_batches(count, batch_size):
+
+    random.seed(0)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = [''.join(random.choices(letters, k=random.randint(5, 9))).encode() for _ in range(max(1, count // 100))]
+
+    candidates = []
+    # the output size is an estimate, so ask for more than needed
+    for word in Mangler(words, output_size=count*2, leet=True, cap=True, pend=True):
+        candidates.append(word)
+        if len(candidates) >= count:
+            break
+
+    return [candidates[i:i+batch_size] for i in range(0, len(candidates), batch_size)]
+
+
+def rate(batches, hash_type, processes):
+    '''
+    hashes per second
+    '''
+
+    # a few hundred targets, none of which will be cracked
+    targets = set(random.randbytes(len(hash_types[hash_type](b''))) for _ in range(500))
+    count = sum(len(b) for b in batches)
+
+    if processes == 1:
+        _init_worker(targets, hash_type)
+        start = time.perf_counter()
+        for batch in batches:
+            _crack_batch(batch)
+        return count / (time.perf_counter() - start)
+
+    with Pool(processes, initializer=_init_worker, initargs=(targets, hash_type)) as pool:
+        # make sure every worker has started
+        pool.map(_crack_batch, [[b'warmup']] * processes * 4, chunksize=1)
+        start = time.perf_counter()
+        for result in pool.imap_unordered(_crack_batch, batches):
+            pass
+        return count / (time.perf_counter() - start)
+
+
+def human(n):
+
+    for unit in ['', 'K', 'M', 'B']:
+        if n < 1000:
+            return f'{n:.2f}{unit}'
+        n /= 1000
+    return f'{n:.2f}T'
+
+
+def main():
+
+    parser = ArgumentParser(description='hashing throughput for --hashes')
+    parser.add_argument('--candidates',     type=int,   default=500000,     help='number of candidates to hash (default: 500000)')
+    parser.add_argument('--batch-size',     type=int,   default=10000,      help='candidates per batch (default: 10000, same as --hashes)')
+    parser.add_argument('--processes',      type=int,   nargs='+',          help='process counts to try (default: 1, 2, 4 ... number of CPUs)')
+    parser.add_argument('--hash-types',     nargs='+',  default=list(hash_types), choices=list(hash_types))
+    options = parser.parse_args()
+
+    processes = options.processes
+    if not processes:
+        processes = [1]
+        while processes[-1] * 2 <= (cpu_count() or 1):
+            processes.append(processes[-1] * 2)
+
+    batches = make_batches(options.candidates, options.batch_size)
+    print(f'{sum(len(b) for b in batches):,} candidates in batches of {options.batch_size:,}, {cpu_count()} CPUs\n')
+    print(f'{"hash":<8}{"processes":>10}{"total":>14}{"per process":>14}')
+
+    for hash_type in options.hash_types:
+        for p in processes:
+            r = rate(batches, hash_type, p)
+            print(f'{hash_type:<8}{p:>10}{human(r) + "H/s":>14}{human(r / p) + "H/s":>14}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+'''
+hit rate per candidate for --model vs. the default order of --leet and --capswap variants
+
+    1. the passwords are shuffled (with a fixed seed) and split in half
+    2. a model is trained on the first half (like --train)
+    3. the input wordlist is the second half with the substitutions undone
+       (lowercase, leet characters back to letters)
+    4. each --limit is run with and without the model,
+       and the candidates are checked against the second half (like --evaluate)
+
+without --passwords, a synthetic list is generated from a fixed seed, where people
+capitalize the first letter more often than the others and each leet substitution
+has its own probability, so the results are the same on every machine
+use --passwords with a real list of cracked passwords for numbers that mean something
+'''
+
+import os
+import sys
+import random
+import tempfile
+from pathlib import Path
+from argparse import ArgumentParser
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.model import Model, evaluate
+from lib.mangler import Mangler
+from lib.utils import human_to_int, ReadFile
+
+syllables = ['pass', 'word', 'sun', 'shine', 'dragon', 'mon', 'key', 'star', 'blue', 'ro', 'se', 'ti', 'ger', 'lo', 'ver', 'mas', 'ter', 'foot', 'ball', 'ice']
+
+# letter --> [(leet char, probability), ...]
+synthetic_leet = {
+    'a': [('@', .25)],
+    'e': [('3', .2)],
+    'i': [('1', .15)],
+    'o': [('0', .3)],
+    's': [('$', .1), ('5', .05)],
+    't': [('7', .05)],
+}
+
+# leet character --> letter, for undoing substitutions
+unleet = {'@': 'a', '4': 'a', '3': 'e', '1': 'i', '0': 'o', '5': 's', '$': 's', '7': 't'}
+
+
+def synthetic_passwords(count, rng):
+
+    passwords = []
+    for _ in range(count):
+        word = ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 3)))
+        password = ''
+        for i, c in enumerate(word):
+            if rng.random() < (.5 if i == 0 else .03):
+                c = c.upper()
+            for leet_char, p in synthetic_leet.get(c, []):
+                if rng.random() < p:
+                    c = leet_char
+                    break
+            password += c
+        passwords.append(password)
+    return passwords
+
+
+def base_word(password):
+    '''
+    returns the password with substitutions undone, or None if it isn't just letters and leet
+    '''
+
+    word = ''.join(unleet.get(c, c) for c in password).lower()
+    if word.isascii() and word.isalpha():
+        return word
+    return None
+
+
+def main():
+
+    parser = ArgumentParser(description='hit rate per candidate for --model vs. the default order')
+    parser.add_argument('--passwords',                                          help='list of cracked passwords (default: synthetic)', metavar='FILE')
+    parser.add_argument('--count',      type=int,           default=4000,       help='number of synthetic passwords (default: 4000)')
+    parser.add_argument('--limits',     type=human_to_int,  nargs='+',          default=[5000, 10000, 20000, 50000, 100000], help='--limit values to try (default: 5K 10K 20K 50K 100K)')
+    parser.add_argument('--seed',       type=int,           default=0,          help='seed for the shuffle and the synthetic passwords (default: 0)')
+    options = parser.parse_args()
+
+    rng = random.Random(options.seed)
+    if options.passwords:
+        passwords = [p.decode('utf-8', errors='ignore') for p in ReadFile(options.passwords)]
+    else:
+        passwords = synthetic_passwords(options.count, rng)
+    rng.shuffle(passwords)
+    train, test = passwords[:len(passwords)//2], passwords[len(passwords)//2:]
+    words = list(dict.fromkeys(w for w in map(base_word, test) if w is not None))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        train_file = os.path.join(tmp_dir, 'train.txt')
+        test_file = os.path.join(tmp_dir, 'test.txt')
+        for filename, split in [(train_file, train), (test_file, test)]:
+            with open(filename, 'w') as f:
+                f.write('\n'.join(split) + '\n')
+
+        model = Model.train(train_file)
+
+        print(f'{"synthetic" if not options.passwords else options.passwords}: {len(train):,} passwords to train on, {len(test):,} to test against, {len(words):,} input words')
+        print('flags: --leet --capswap\n')
+        print(f'{"--limit":>10}{"candidates":>12}{"hits":>10}{"with --model":>15}{"change":>10}')
+
+        for limit in options.limits:
+            results = []
+            for m in [None, model]:
+                mangler = Mangler([w.encode() for w in words], output_size=limit, leet=True, capswap=True, model=m)
+                results.append(evaluate(mangler, test_file))
+            (hits, total), (model_hits, model_total) = results
+            assert total == model_total
+            change = f'{(model_hits - hits) / hits * 100:+.0f}%' if hits else ''
+            print(f'{limit:>10,}{total:>12,}{hits:>10,}{model_hits:>15,}{change:>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+'''
+compares time-to-first-candidate for a cold CLI run vs. a warm --serve instance
+
+    cold:           python stretcher.py -i words.txt <flags>
+    warm (client):  the same job through request_candidates() after the server has loaded the wordlist
+    warm (CLI):     python stretcher.py --connect SOCKET -i words.txt <flags>
+
+exits with 1 if the warm client isn't at least --min-speedup times faster
+'''
+
+import os
+import sys
+import time
+import random
+import tempfile
+import subprocess
+from pathlib import Path
+from statistics import median
+from argparse import ArgumentParser
+
+repo = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo))
+from lib.server import request_candidates
+
+stretcher = repo / 'stretcher.py'
+
+# stretcher flag --> key in the job spec that --connect sends
+bool_flags = {
+    '-L': 'leet', '--leet': 'leet',
+    '-c': 'cap', '--cap': 'cap',
+    '-C': 'capswap', '--capswap': 'capswap',
+    '-p': 'pend', '--pend': 'pend',
+    '-dd': 'double', '--double': 'double',
+    '--adaptive': 'adaptive',
+}
+value_flags = {
+    '--limit': ('limit', str),
+    '-P': ('permutations', int), '--permutations': ('permutations', int),
+    '-m': ('min_length', int), '--min-length': ('min_length', int),
+    '-M': ('max_length', int), '--max-length': ('max_length', int),
+    '--model': ('model', os.path.abspath),
+}
+
+
+def make_wordlist(filename, count):
+
+    random.seed(0)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    with open(filename, 'w') as f:
+        for i in range(count):
+            f.write(''.join(random.choices(letters, k=random.randint(4, 12))) + '\n')
+
+
+def job_spec(wordlist, flags):
+    '''
+    the job spec which "--connect SOCKET -i wordlist <flags>" sends
+    '''
+
+    spec = {'input': wordlist}
+    flags = list(flags)
+    while flags:
+        flag = flags.pop(0)
+        if flag in bool_flags:
+            spec[bool_flags[flag]] = True
+        elif flag in value_flags and flags:
+            key, _type = value_flags[flag]
+            spec[key] = _type(flags.pop(0))
+        else:
+            raise ValueError(f'{flag} is not supported by --connect')
+    return spec
+
+
+def first_line(cmd):
+    '''
+    runs cmd, returns (seconds until the first line of output, total seconds, output)
+    '''
+
+    start = time.time()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    output = process.stdout.readline()
+    first = time.time() - start
+    output += process.stdout.read()
+    process.wait()
+    return (first, time.time() - start, output)
+
+
+def first_chunk(socket_path, spec):
+
+    start = time.time()
+    chunks = request_candidates(socket_path, spec)
+    output = next(chunks)
+    first = time.time() - start
+    output += b''.join(chunks)
+    return (first, time.time() - start, output)
+
+
+def main():
+
+    parser = ArgumentParser(description='warm vs. cold start benchmark for --serve')
+    parser.add_argument('-i', '--input',                                help='wordlist (default: 200K random words)')
+    parser.add_argument('--flags',          default='--pend --limit 10K', help='stretcher flags for each job (default: "--pend --limit 10K")')
+    parser.add_argument('--runs',           type=int,   default=5,      help='runs of each (default: 5)')
+    parser.add_argument('--min-speedup',    type=float, default=2.0,    help='fail unless the warm client is this many times faster (default: 2)')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        wordlist = options.input
+        if wordlist is None:
+            wordlist = os.path.join(tmp_dir, 'words.txt')
+            make_wordlist(wordlist, 200000)
+        wordlist = os.path.abspath(wordlist)
+        flags = options.flags.split()
+        try:
+            spec = job_spec(wordlist, flags)
+        except ValueError as e:
+            parser.error(str(e))
+
+        cold = [first_line([sys.executable, str(stretcher), '-i', wordlist] + flags) for _ in range(options.runs)]
+
+        socket_path = os.path.join(tmp_dir, 'stretcher.sock')
+        server = subprocess.Popen([sys.executable, str(stretcher), '--serve', socket_path], stderr=subprocess.DEVNULL)
+        try:
+            while not os.path.exists(socket_path):
+                assert server.poll() is None, 'server exited'
+                time.sleep(.01)
+
+            # the first job loads the wordlist and rules
+            first_job = first_chunk(socket_path, spec)
+            warm = [first_chunk(socket_path, spec) for _ in range(options.runs)]
+            warm_cli = [first_line([sys.executable, str(stretcher), '--connect', socket_path, '-i', wordlist] + flags) for _ in range(options.runs)]
+        finally:
+            server.terminate()
+            server.wait()
+
+    # make sure they're all the same job
+    for name, times in [('first server job', [first_job]), ('warm server (client)', warm), ('warm server (--connect)', warm_cli)]:
+        if any(t[2] != cold[0][2] for t in times):
+            print(f'[!] Output from {name} differs from the cold CLI run')
+            sys.exit(1)
+
+    print(f'job: -i {wordlist} {" ".join(flags)}  (median of {options.runs} runs)\n')
+    print(f'{"":<28}{"first candidate":>18}{"total":>12}')
+    for name, times in [
+            ('cold CLI', cold),
+            ('first server job', [first_job]),
+            ('warm server (client)', warm),
+            ('warm server (--connect)', warm_cli),
+        ]:
+        print(f'{name:<28}{median(t[0] for t in times) * 1000:>15.1f}ms{median(t[1] for t in times) * 1000:>10.1f}ms')
+
+    speedup = median(t[0] for t in cold) / median(t[0] for t in warm)
+    print(f'\nwarm client is {speedup:.1f}x faster to the first candidate')
+    if speedup < options.min_speedup:
+        print(f'[!] expected at least {options.min_speedup:.1f}x')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+'''
+startup benchmark for a plain "-i file" run
+
+    1. wall time of stretcher.py vs. a bare "python -c pass"
+    2. python -X importtime: the slowest imports,
+       and any heavy module that shouldn't be loaded for this run
+
+exits with 1 if the run takes more than --target ms longer than the bare interpreter,
+or if a heavy module was imported
+'''
+
+import os
+import re
+import sys
+import time
+import tempfile
+import subprocess
+from pathlib import Path
+from statistics import median
+from argparse import ArgumentParser
+
+stretcher = Path(__file__).resolve().parent.parent / 'stretcher.py'
+
+# only needed for websites, --hashes, --serve, etc.
+heavy_modules = ['requests', 'multiprocessing', 'asyncio', 'concurrent.futures', 'lib.spider', 'lib.hasher', 'lib.server']
+
+importtime_regex = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+
+def wall_time(cmd, runs):
+
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return median(times)
+
+
+def import_times(cmd):
+    '''
+    returns {module: (self µs, cumulative µs)} for top-level imports
+    and the set of every imported module
+    '''
+
+    process = subprocess.run([cmd[0], '-X', 'importtime'] + cmd[1:], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+    top_level = dict()
+    modules = set()
+    for line in process.stderr.splitlines():
+        match = importtime_regex.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            modules.add(module)
+            if len(indent) == 0:
+                top_level[module] = (int(self_us), int(cumulative_us))
+    return top_level, modules
+
+
+def main():
+
+    parser = ArgumentParser(description='startup time for a plain "-i file" run')
+    parser.add_argument('--flags',      default='--pend --limit 10',        help='stretcher flags (default: "--pend --limit 10")')
+    parser.add_argument('--runs',       type=int,       default=10,         help='runs of each (default: 10)')
+    parser.add_argument('--target',     type=float,     default=20,         help='max ms over a bare interpreter (default: 20)')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        wordlist = os.path.join(tmp_dir, 'words.txt')
+        with open(wordlist, 'w') as f:
+            f.write('password\nsummer\ndragon\n')
+
+        cmd = [sys.executable, str(stretcher), '-i', wordlist] + options.flags.split()
+        bare = wall_time([sys.executable, '-c', 'pass'], options.runs)
+        run = wall_time(cmd, options.runs)
+        top_level, modules = import_times(cmd)
+
+    print(f'stretcher.py -i words.txt {options.flags}  (median of {options.runs} runs)\n')
+    print(f'{"python -c pass":<24}{bare * 1000:>8.1f}ms')
+    print(f'{"stretcher.py":<24}{run * 1000:>8.1f}ms')
+    overhead = (run - bare) * 1000
+    print(f'{"overhead":<24}{overhead:>8.1f}ms  (target: {options.target:.0f}ms)\n')
+
+    print('slowest top-level imports (cumulative):')
+    for module, (self_us, cumulative_us) in sorted(top_level.items(), key=lambda x: x[1][1], reverse=True)[:10]:
+        print(f'    {module:<32}{cumulative_us / 1000:>8.1f}ms')
+
+    failed = False
+    loaded = [m for m in heavy_modules if m in modules]
+    if loaded:
+        print(f'\n[!] Imported modules which this run doesn\'t need: {", ".join(loaded)}')
+        failed = True
+    if overhead > options.target:
+        print(f'\n[!] Startup overhead is over the {options.target:.0f}ms target')
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print('\n[+] OK')
+
+
+if __name__ == '__main__':
+    main()
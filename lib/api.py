@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+'''
+embeddable interface for generating candidates in-process
+
+    from lib.api import Config, batches
+
+    config = Config(['password', 'admin'], leet=True, pend=True, limit=100000)
+    for batch in batches(config, size=10000):
+        ...
+'''
+
+import asyncio
+import itertools
+from pathlib import Path
+from .mangler import Mangler
+from .model import Model
+from .utils import ReadFile, Wordlist, human_to_int
+
+
+class Config():
+    '''
+    options for one candidate stream, same as the command-line flags
+
+    input can be a wordlist filename, a Wordlist from Mangler.read_input(),
+    or any iterable of words (str or bytes)
+    a Wordlist read with cap=True can only be used with cap=True (and not capswap),
+    otherwise the basic cap mutations are applied as needed
+    limit can be an int or human-readable like "10M"
+    model can be a Model or the filename of a saved one
+    '''
+
+    def __init__(self, input, limit=None, leet=False, cap=False, capswap=False, pend=False, double=False, permutations=1, min_length=None, max_length=None, shard=None, model=None, adaptive=False):
+
+        self.input          = input
+        self.limit          = None if limit is None else human_to_int(limit)
+        self.leet           = leet
+        self.cap            = cap
+        self.capswap        = capswap
+        self.pend           = pend
+        self.double         = double
+        self.permutations   = permutations
+        self.min_length     = min_length
+        self.max_length     = max_length
+        self.shard          = shard
+        self.model          = model
+        self.adaptive       = adaptive
+
+
+    def mangler(self):
+        '''
+        returns a new Mangler for this config
+        '''
+
+        return Mangler(
+            _input=self._input(),
+            output_size=self.limit,
+            double=self.double,
+            perm=self.permutations,
+            leet=self.leet,
+            cap=self.cap,
+            capswap=self.capswap,
+            pend=self.pend,
+            min_length=self.min_length,
+            max_length=self.max_length,
+            shard=self.shard,
+            model=self._model(),
+            adaptive=self.adaptive,
+        )
+
+
+    def _model(self):
+
+        if isinstance(self.model, (str, Path)):
+            return Model.load(self.model)
+        return self.model
+
+
+    def _input(self):
+
+        if isinstance(self.input, (str, Path)):
+            return ReadFile(self.input)
+        elif isinstance(self.input, Wordlist):
+            return self.input
+        else:
+            return (w.encode('utf-8') if type(w) == str else w for w in self.input)
+
+
+
+def candidates(config):
+    '''
+    yields each candidate as bytes
+    '''
+
+    yield from config.mangler()
+
+
+def batches(config, size=10000, join=False):
+    '''
+    yields lists of up to <size> candidates
+    if join is True, yields newline-terminated buffers instead
+    '''
+
+    mangler = iter(config.mangler())
+    while 1:
+        batch = list(itertools.islice(mangler, size))
+        if not batch:
+            break
+        if join:
+            yield b'\n'.join(batch) + b'\n'
+        else:
+            yield batch
+
+
+async def abatches(config, size=10000, join=False):
+    '''
+    async version of batches()
+    each batch is generated in the default executor so the event loop isn't blocked
+    '''
+
+    loop = asyncio.get_running_loop()
+    _batches = batches(config, size=size, join=join)
+
+    while 1:
+        batch = await loop.run_in_executor(None, next, _batches, None)
+        if batch is None:
+            break
+        yield batch
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+from math import ceil, log, exp
+
+
+class BudgetController():
+    '''
+    adjusts per-mutator limits during the run so that the output
+    lands on the requested size and is spread evenly across the input
+
+    before each input word:
+        quota = (remaining output - expected output of words which run out of variants)
+                / expected number of remaining words which will fill their quota
+        mutator limits = initial limits * g
+    after each input word:
+        if the word couldn't fill its quota, g grows
+        if it was cut off at its quota, g shrinks a little
+
+    the expected output is tracked separately for each word length
+    (the input is sorted by length, and short words have fewer variants)
+
+    the output for each word is cut off at its quota (and the quota never
+    goes over the remaining output), so the total never goes over the target
+    words which can't fill their quota leave the rest of it to the ones which can
+    '''
+
+    # how quickly g follows the observed yield (0 - 1)
+    gain = 0.25
+    # bounds for log(g)
+    max_log_scale = log(64)
+    # shrink g by this much when a word reaches its quota
+    # keeps the limits from drifting upward and truncating too much
+    shrink = log(0.95)
+    # weight of each new word in the fill statistics (roughly 1 / the number of words they cover)
+    decay = 0.01
+
+    def __init__(self, mutators, target_size, lengths):
+        '''
+        lengths is {word length: number of words}
+        or {None: number of words} if the lengths aren't known
+        '''
+
+        self.mutators = mutators
+        self.target_size = target_size
+        self.lengths = dict(lengths)
+        self.num_words = max(1, sum(self.lengths.values()))
+        self.initial_limits = [m.limit for m in mutators]
+
+        self.log_scale = 0.
+        self.words_done = 0
+        self.produced = 0
+        self.quota = 0
+        self.length = None
+
+        # word length --> [words seen, fraction which filled their quota,
+        #                  output per word from the ones which didn't]
+        self.stats = dict()
+
+
+    def start_word(self, length=None):
+        '''
+        sets the mutator limits for the next input word
+        returns its quota
+        '''
+
+        remaining_words = max(1, self.num_words - self.words_done)
+        remaining_size = max(0, self.target_size - self.produced)
+
+        # lengths which haven't come up yet are assumed to be like the last one
+        default = self.stats.get(length, self.stats.get(self.length, [0, 1., 0.]))
+        self.length = length
+        short_output = 0.
+        expected_fill = 0.
+        for l, count in self.lengths.items():
+            seen, fill_rate, short_yield = self.stats.get(l, [0] + default[1:])
+            remaining = max(0, count - seen)
+            short_output += remaining * short_yield
+            expected_fill += remaining * fill_rate
+
+        # at least an even share
+        quota = ceil(remaining_size / remaining_words)
+        if expected_fill >= 1:
+            quota = max(quota, ceil((remaining_size - short_output) / expected_fill))
+        self.quota = min(quota, remaining_size)
+
+        if self.mutators:
+            scale = exp(self.log_scale / len(self.mutators))
+            for mutator, limit in zip(self.mutators, self.initial_limits):
+                mutator.limit = max(1, round(limit * scale))
+                # unused budget is handled by the quota instead
+                mutator.cur_limit = 0
+
+        return self.quota
+
+
+    def end_word(self, count):
+
+        self.words_done += 1
+        self.produced += count
+
+        if self.quota <= 0:
+            return
+
+        try:
+            stats = self.stats[self.length]
+        except KeyError:
+            stats = self.stats[self.length] = [0, 1., 0.]
+        stats[0] += 1
+        # a plain average until there are enough words for the moving one
+        weight = max(self.decay, 1 / stats[0])
+        filled = count >= self.quota
+        stats[1] += weight * (filled - stats[1])
+        stats[2] += weight * ((0 if filled else count) - stats[2])
+
+        if not filled:
+            self.log_scale += self.gain * log(self.quota / max(count, 1))
+        else:
+            self.log_scale += self.shrink
+
+        self.log_scale = max(-self.max_log_scale, min(self.max_log_scale, self.log_scale))
+
+
+    def state(self):
+
+        return {
+            'log_scale': self.log_scale,
+            'words_done': self.words_done,
+            'produced': self.produced,
+            # as a list, since JSON keys can only be strings
+            'stats': [[length] + stats for length, stats in self.stats.items()],
+        }
+
+
+    def restore(self, state):
+
+        self.log_scale = state['log_scale']
+        self.words_done = state['words_done']
+        self.produced = state['produced']
+        self.stats = {s[0]: s[1:] for s in state['stats']}
@@ -3,6 +3,7 @@
 # by TheTechromancer
 
 from .mutator import Mutator
+from .model import ranked_product
 
 
 class Cap(Mutator):
@@ -12,9 +13,11 @@ class Cap(Mutator):
     scale = 2
     fname = 'capitalization'
 
-    def __init__(self, _input, limit=256, capswap=False):
+    def __init__(self, _input, limit=256, capswap=False, model=None):
 
         self.capswap = capswap
+        # optional Model to order capswap variants by learned probability
+        self.model = model
         # the average number of words produced by the cap() (not capswap)
 
         super().__init__(_input, limit)
@@ -39,7 +42,11 @@ class Cap(Mutator):
 
         # then move on to full cap mutations if requested
         if self.capswap:
-            for r in self._capswap(word):
+            if self.model is None:
+                variants = self._capswap(word)
+            else:
+                variants = ranked_product(self.model.case_options(word))
+            for r in variants:
                 if not r in results:
                     yield r
 
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+import os
+import json
+import signal
+from time import time
+from pathlib import Path
+from .errors import CheckpointError
+
+
+class Checkpoint():
+    '''
+    periodically saves the spider state, the position in the mutator chain
+    and the amount of output written, so an interrupted job can be resumed
+
+    each save is atomic (written to a temporary file, then renamed)
+    '''
+
+    def __init__(self, filename, flags, interval=30):
+
+        self.filename = Path(filename)
+        # round-trip through JSON so it compares equal to a loaded checkpoint
+        self.flags = json.loads(json.dumps(flags))
+        # seconds between periodic saves
+        self.interval = interval
+        self.last_save = time()
+
+        self.state = {
+            'flags': self.flags,
+            'spider': None,
+            'mangler': None,
+            'output': None,
+        }
+
+
+    def load(self):
+
+        try:
+            with open(self.filename) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            raise CheckpointError(f'Cannot find the checkpoint {self.filename}')
+        except ValueError:
+            raise CheckpointError(f'Invalid checkpoint: {self.filename}')
+
+        if state.get('flags') != self.flags:
+            raise CheckpointError(f'Options differ from the ones stored in {self.filename}')
+
+        self.state = state
+        return state
+
+
+    def due(self):
+
+        return time() - self.last_save >= self.interval
+
+
+    def save(self, **state):
+        '''
+        updates the given parts of the state (spider, mangler, output) and saves
+        '''
+
+        self.state.update(state)
+
+        tmp_file = self.filename.with_name(self.filename.name + '.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.filename)
+
+        self.last_save = time()
+
+
+    def remove(self):
+
+        try:
+            os.unlink(self.filename)
+        except FileNotFoundError:
+            pass
+
+
+
+class StopSignal():
+    '''
+    while active, SIGINT and SIGTERM only set self.requested
+    so the output loop can save a checkpoint at a clean point before exiting
+
+    a second signal is handled as usual, in case that point never comes
+    '''
+
+    signals = [signal.SIGINT, signal.SIGTERM]
+
+    def __init__(self, enabled=True):
+
+        self.enabled = enabled
+        self.requested = False
+        self.handlers = dict()
+
+
+    def __enter__(self):
+
+        if self.enabled:
+            for s in self.signals:
+                self.handlers[s] = signal.signal(s, self.handle)
+        return self
+
+
+    def __exit__(self, *args):
+
+        for s, handler in self.handlers.items():
+            signal.signal(s, handler)
+        self.handlers.clear()
+
+
+    def handle(self, signum, frame):
+
+        if self.requested:
+            self.__exit__()
+            signal.raise_signal(signum)
+        self.requested = True
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+import os
+import json
+from pathlib import Path
+from .errors import DeltaError
+
+
+class Manifest():
+    '''
+    remembers the input words, flags and per-mutator limits of a previous run
+    so that the next run only generates candidates for new words
+
+    file format:
+        line 1:     JSON header (flags + mutator limits)
+        line 2+:    every input word seen so far, one per line
+    '''
+
+    def __init__(self, filename, flags):
+
+        self.filename = Path(filename)
+        self.flags = dict(flags)
+        # [[fname, limit], ...] for each mutator after Perm
+        self.limits = None
+        self.words = set()
+        # words seen during this run which weren't in the manifest
+        self.new_words = []
+
+        if self.filename.is_file():
+            self.read()
+
+
+    def read(self):
+
+        with open(self.filename, 'rb') as f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                raise DeltaError(f'Invalid delta manifest: {self.filename}')
+
+            if header.get('flags') != self.flags:
+                raise DeltaError(f'Options differ from the ones stored in {self.filename}, use a new manifest')
+            self.limits = header.get('limits', None)
+
+            for line in f:
+                line = line.strip(b'\r\n')
+                if line:
+                    self.words.add(line)
+
+
+    def filter(self, _input):
+        '''
+        yields only the words which weren't present in the previous run
+        '''
+
+        for word in _input:
+            if not word in self.words:
+                self.words.add(word)
+                self.new_words.append(word)
+                yield word
+
+
+    def apply(self, mangler):
+        '''
+        give the new words the same per-word budgets as the previous run
+        '''
+
+        if self.limits is None:
+            return
+
+        mutators = mangler.mutators[1:]
+        if [str(m) for m in mutators] != [fname for fname, limit in self.limits]:
+            raise DeltaError(f'Mutators differ from the ones stored in {self.filename}, use a new manifest')
+
+        for mutator, (fname, limit) in zip(mutators, self.limits):
+            mutator.limit = limit
+
+
+    def write(self, mangler):
+        '''
+        atomically write the updated manifest
+        '''
+
+        if self.limits is None:
+            self.limits = [[str(m), m.limit] for m in mangler.mutators[1:]]
+
+        header = json.dumps({'flags': self.flags, 'limits': self.limits})
+
+        tmp_file = self.filename.with_name(self.filename.name + '.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(header.encode('utf-8') + b'\n')
+            for word in self.words:
+                f.write(word + b'\n')
+        os.replace(tmp_file, self.filename)
@@ -9,4 +9,22 @@ class SpiderError(PasswordStretcherError):
     pass
 
 class InputListError(PasswordStretcherError):
+    pass
+
+class DeltaError(PasswordStretcherError):
+    pass
+
+class HashListError(PasswordStretcherError):
+    pass
+
+class ServerError(PasswordStretcherError):
+    pass
+
+class ModelError(PasswordStretcherError):
+    pass
+
+class OutputError(PasswordStretcherError):
+    pass
+
+class CheckpointError(PasswordStretcherError):
     pass
\ No newline at end of file
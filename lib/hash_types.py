@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+# supported --hash-type values --> length of their hex digests
+# kept out of lib.hasher so the argument parser doesn't have to import it
+hash_lengths = {
+    'md5':  32,
+    'sha1': 40,
+    'ntlm': 32,
+}
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+import struct
+import hashlib
+import itertools
+from time import time
+from os import cpu_count
+from pathlib import Path
+from multiprocessing import Pool
+from .errors import HashListError
+from .hash_types import hash_lengths
+
+
+def _md4_python(data):
+    '''
+    pure-python MD4 (RFC 1320)
+    used for NTLM when OpenSSL doesn't provide it
+    '''
+
+    mask = 0xffffffff
+
+    def rol(x, n):
+        return ((x << n) & mask) | (x >> (32 - n))
+
+    bit_length = (len(data) * 8) & 0xffffffffffffffff
+    data = data + b'\x80' + (b'\x00' * ((55 - len(data)) % 64)) + struct.pack('<Q', bit_length)
+
+    a, b, c, d = 0x67452301, 0xefcdab89, 0x98badcfe, 0x10325476
+
+    for offset in range(0, len(data), 64):
+        x = struct.unpack('<16I', data[offset:offset+64])
+        aa, bb, cc, dd = a, b, c, d
+
+        # round 1
+        for i in range(0, 16, 4):
+            a = rol((a + ((b & c) | (~b & d)) + x[i]) & mask, 3)
+            d = rol((d + ((a & b) | (~a & c)) + x[i+1]) & mask, 7)
+            c = rol((c + ((d & a) | (~d & b)) + x[i+2]) & mask, 11)
+            b = rol((b + ((c & d) | (~c & a)) + x[i+3]) & mask, 19)
+
+        # round 2
+        for i in range(4):
+            a = rol((a + ((b & c) | (b & d) | (c & d)) + x[i] + 0x5a827999) & mask, 3)
+            d = rol((d + ((a & b) | (a & c) | (b & c)) + x[i+4] + 0x5a827999) & mask, 5)
+            c = rol((c + ((d & a) | (d & b) | (a & b)) + x[i+8] + 0x5a827999) & mask, 9)
+            b = rol((b + ((c & d) | (c & a) | (d & a)) + x[i+12] + 0x5a827999) & mask, 13)
+
+        # round 3
+        for i in (0, 2, 1, 3):
+            a = rol((a + (b ^ c ^ d) + x[i] + 0x6ed9eba1) & mask, 3)
+            d = rol((d + (a ^ b ^ c) + x[i+8] + 0x6ed9eba1) & mask, 9)
+            c = rol((c + (d ^ a ^ b) + x[i+4] + 0x6ed9eba1) & mask, 11)
+            b = rol((b + (c ^ d ^ a) + x[i+12] + 0x6ed9eba1) & mask, 15)
+
+        a = (a + aa) & mask
+        b = (b + bb) & mask
+        c = (c + cc) & mask
+        d = (d + dd) & mask
+
+    return struct.pack('<4I', a, b, c, d)
+
+
+def _md4_openssl(data):
+
+    return hashlib.new('md4', data).digest()
+
+
+# OpenSSL 3 moved MD4 to the legacy provider
+try:
+    hashlib.new('md4', b'')
+    _md4 = _md4_openssl
+except ValueError:
+    _md4 = _md4_python
+
+
+def _to_utf16(word):
+
+    try:
+        return word.decode('utf-8').encode('utf-16-le')
+    except UnicodeDecodeError:
+        return word.decode('latin-1').encode('utf-16-le')
+
+
+def md5(word):
+
+    return hashlib.md5(word).digest()
+
+
+def sha1(word):
+
+    return hashlib.sha1(word).digest()
+
+
+def ntlm(word):
+
+    return _md4(_to_utf16(word))
+
+
+# each hash type's function has the same name
+hash_types = {name: globals()[name] for name in hash_lengths}
+
+
+# set in each worker process by _init_worker()
+_targets = None
+_hash_function = None
+
+
+def _init_worker(targets, hash_type):
+
+    global _targets, _hash_function
+    _targets = targets
+    _hash_function = hash_types[hash_type]
+
+
+def _crack_batch(batch):
+
+    hits = []
+    for word in batch:
+        digest = _hash_function(word)
+        if digest in _targets:
+            hits.append((digest, word))
+    return (len(batch), hits)
+
+
+
+class Hasher():
+    '''
+    hashes candidates in batches across a process pool
+    and compares them against a set of target hashes
+    '''
+
+    def __init__(self, filename, hash_type='md5', processes=None, batch_size=10000):
+
+        if not hash_type in hash_types:
+            raise HashListError(f'Unsupported hash type "{hash_type}", choose from {", ".join(hash_types)}')
+
+        self.filename = str(filename)
+        self.hash_type = hash_type
+        self.processes = max(1, processes or cpu_count() or 1)
+        self.batch_size = batch_size
+
+        self.targets = set()
+        self.read_hashes()
+
+        # stats for throughput reporting
+        self.hashed = 0
+        self.cracked = 0
+        self.elapsed = 0.
+
+
+    def read_hashes(self):
+        '''
+        accepts bare hashes or colon-delimited lines like "user:hash" or pwdump
+        '''
+
+        if not Path(self.filename).is_file():
+            raise HashListError(f'Cannot find the hash file {self.filename}')
+
+        hash_length = hash_lengths[self.hash_type]
+
+        with open(self.filename) as f:
+            for line in f:
+                for field in reversed(line.strip().split(':')):
+                    if len(field) == hash_length:
+                        try:
+                            self.targets.add(bytes.fromhex(field))
+                            break
+                        except ValueError:
+                            continue
+
+        if not self.targets:
+            raise HashListError(f'No {self.hash_type} hashes found in {self.filename}')
+
+
+    def crack(self, candidates):
+        '''
+        yields (hex_hash, plaintext) for each candidate which matches a target
+        '''
+
+        start_time = time()
+        batches = self.batches(candidates)
+
+        try:
+            if self.processes == 1:
+                _init_worker(self.targets, self.hash_type)
+                results = map(_crack_batch, batches)
+                yield from self._hits(results)
+            else:
+                with Pool(self.processes, initializer=_init_worker, initargs=(self.targets, self.hash_type)) as pool:
+                    results = pool.imap_unordered(_crack_batch, batches)
+                    yield from self._hits(results)
+        finally:
+            self.elapsed = time() - start_time
+
+
+    def batches(self, candidates):
+
+        candidates = iter(candidates)
+        while 1:
+            batch = list(itertools.islice(candidates, self.batch_size))
+            if not batch:
+                break
+            yield batch
+
+
+    def _hits(self, results):
+
+        for count, hits in results:
+            self.hashed += count
+            for digest, word in hits:
+                # only report each hash once
+                if digest in self.targets:
+                    self.targets.discard(digest)
+                    self.cracked += 1
+                    yield (digest.hex(), word)
+            # everything's cracked, no need to generate the rest
+            if not self.targets:
+                return
+
+
+    @property
+    def rate(self):
+        '''
+        candidates per second, including the time spent generating them
+        (see benchmarks/hash_rate.py for the hashing speed alone)
+        '''
+
+        try:
+            return self.hashed / self.elapsed
+        except ArithmeticError:
+            return 0.
@@ -3,6 +3,7 @@
 # by TheTechromancer
 
 from .mutator import Mutator
+from .model import ranked_product
 
 
 class Leet(Mutator):
@@ -10,10 +11,13 @@ class Leet(Mutator):
     scale = 1
     fname = 'leet'
 
-    def __init__(self, _input, limit=128):
+    def __init__(self, _input, limit=128, model=None):
 
         super().__init__(_input, limit)
 
+        # optional Model to order variants by learned probability
+        self.model = model
+
         # "leet" character swaps - modify as needed.
         # Keys are replaceable characters; values are their leet replacements
         self.leet_common = self._dict_str_to_bytes({
@@ -53,7 +57,13 @@ class Leet(Mutator):
 
     def mutate(self, word):
 
-        for r in self._leet(word, swap_values=self.leet_common):
+        if self.model is None:
+            variants = self._leet(word, swap_values=self.leet_common)
+        else:
+            # same substitutions as without a model, only the order changes
+            variants = ranked_product(self.model.leet_options(word, self.leet_common))
+
+        for r in variants:
             yield r
 
 
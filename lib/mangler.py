@@ -6,20 +6,24 @@ from .cap import Cap
 from .leet import Leet
 from .pend import Pend
 from .perm import Perm
+from .utils import Wordlist
+from .errors import InputListError
+from .budget import BudgetController
+from math import ceil
 from functools import reduce
 
 class Mangler():
 
-    def __init__(self, _input, output_size=None, double=False, perm=0, leet=False, cap=False, capswap=False, pend=False, key=lambda x: x):
+    def __init__(self, _input, output_size=None, double=False, perm=0, leet=False, cap=False, capswap=False, pend=False, min_length=None, max_length=None, shard=None, model=None, adaptive=False, key=lambda x: x):
 
         # load input list into memory and deduplicate
-        if cap and not capswap:
-            self.input = set(Cap(_input))
+        basic_cap = cap and not capswap
+        if isinstance(_input, Wordlist) and _input.cap == basic_cap:
+            self.input = _input
+        elif isinstance(_input, Wordlist) and _input.cap:
+            raise InputListError('Wordlist already has the basic cap mutations, it can only be used with cap=True')
         else:
-            self.input = set(_input)
-
-        self.input = list(self.input)
-        self.input.sort(key=lambda x: len(x))
+            self.input = self.read_input(_input, cap=basic_cap)
 
         self.perm_depth = perm
         self.leet       = leet
@@ -27,13 +31,27 @@ class Mangler():
         self.cap        = cap or capswap
         self.double     = double
         self.pend       = pend
-
-        self.mutators = [Perm(self.input, double=double, perm_depth=perm)]
+        self.min_length = min_length
+        self.max_length = max_length
+        # adjust mutator limits during the run to hit output_size
+        self.adaptive   = adaptive
+        self.shard      = shard
+
+        # for checkpoint/resume
+        self.position       = 0
+        self.word_state     = None
+        self.word_emitted   = 0
+        self.resume_state   = None
+        # called before each input word (e.g. to save a checkpoint)
+        # runs even when none of the word's mutations are being output
+        self.on_word        = None
+
+        self.mutators = [Perm(self.input, double=double, perm_depth=perm, shard=shard)]
 
         if self.leet:
-            self.mutators.append(Leet(self.mutators[-1]))
+            self.mutators.append(Leet(self.mutators[-1], model=model))
         if self.capswap:
-            self.mutators.append(Cap(self.mutators[-1], capswap=True))
+            self.mutators.append(Cap(self.mutators[-1], capswap=True, model=model))
         if self.pend:
             self.mutators.append(Pend(self.mutators[-1]))
 
@@ -43,6 +61,25 @@ class Mangler():
             self.set_output_size(max(len(self.input)*1000, 100000000))
 
 
+    @staticmethod
+    def read_input(_input, cap=False):
+        '''
+        deduplicates input words and sorts them by length
+        if cap is True, the basic cap mutations are applied first
+        '''
+
+        # dict keeps the input order (unlike a set) so output is reproducible
+        if cap:
+            words = dict.fromkeys(Cap(_input))
+        else:
+            words = dict.fromkeys(_input)
+
+        words = Wordlist(words)
+        words.sort(key=lambda x: len(x))
+        words.cap = cap
+        return words
+
+
     def __iter__(self):
         '''
         generator function
@@ -50,8 +87,133 @@ class Mangler():
         yields each mutated word
         '''
 
-        for word in self.mutators[-1]:
-            yield word
+        controller = None
+        if self.adaptive:
+            controller = BudgetController(self.mutators[1:], *self._adaptive_target())
+
+        resume = self.resume_state
+        self.resume_state = None
+
+        # each input word runs through the whole chain before the next one
+        # so the controller can see how much output each word produced
+        quota = None
+        for position, word in enumerate(self.mutators[0]):
+            skip = 0
+            if resume is not None:
+                if position < resume['position']:
+                    continue
+                if resume['word_state'] is not None:
+                    self._restore_word_state(resume['word_state'], controller)
+                    skip = resume['emitted']
+                resume = None
+
+            # remember where this word started, for checkpoints
+            self.position = position
+            self.word_state = self._word_state(controller)
+            self.word_emitted = skip
+            if self.on_word is not None:
+                self.on_word()
+
+            if controller is not None:
+                # mutators never shorten words, so these can't produce anything
+                if not self._can_fit(word):
+                    continue
+                quota = controller.start_word(len(word) if self.perm_depth <= 1 else None)
+                if quota <= 0:
+                    controller.end_word(0)
+                    continue
+
+            count = 0
+            for mangled_word in self.chain_mutators([word]):
+                if (self.min_length is None or len(mangled_word) >= self.min_length) and \
+                    (self.max_length is None or len(mangled_word) <= self.max_length):
+                    count += 1
+                    # skip what was already written before resuming
+                    if count > skip:
+                        self.word_emitted = count
+                        yield mangled_word
+                    if count == quota:
+                        break
+                elif controller is None:
+                    # if the word didn't meet length requirements, increase the limit by 1
+                    # (the controller makes up for these through the quota instead)
+                    self.mutators[-1].cur_limit += 1
+
+            if controller is not None:
+                controller.end_word(count)
+
+
+    def state(self):
+        '''
+        position in the mutator chain, for checkpoints
+        '''
+
+        return {
+            'position': self.position,
+            'word_state': self.word_state,
+            'emitted': self.word_emitted,
+        }
+
+
+    def restore(self, state):
+        '''
+        continue from a state() on the next iteration
+        '''
+
+        self.resume_state = state
+
+
+    def _word_state(self, controller):
+
+        return {
+            'limits': [[m.limit, m.cur_limit] for m in self.mutators[1:]],
+            'controller': None if controller is None else controller.state(),
+        }
+
+
+    def _restore_word_state(self, word_state, controller):
+
+        for mutator, (limit, cur_limit) in zip(self.mutators[1:], word_state['limits']):
+            mutator.limit = limit
+            mutator.cur_limit = cur_limit
+        if controller is not None:
+            controller.restore(word_state['controller'])
+
+
+    def _adaptive_target(self):
+        '''
+        returns (target size, {word length: number of input words}) for this Mangler's share
+        with permutations, the lengths aren't counted: {None: number of words}
+        '''
+
+        perm = self.mutators[0]
+        if self.perm_depth > 1:
+            num_words = len(perm)
+            lengths = {None: num_words}
+        else:
+            # only this shard's words
+            lengths = dict()
+            for word in perm:
+                if self._can_fit(word):
+                    lengths[len(word)] = lengths.get(len(word), 0) + 1
+            num_words = sum(lengths.values())
+
+        if self.shard is None:
+            return (self.output_size, lengths)
+
+        index, count = self.shard
+        if self.perm_depth > 1:
+            shard_words = max(0, ceil((num_words - index) / count))
+            lengths = {None: shard_words}
+        else:
+            shard_words = num_words
+            num_words = sum(1 for word in perm._perm() if self._can_fit(word))
+        return (int(self.output_size * shard_words / max(1, num_words)), lengths)
+
+
+    def _can_fit(self, word):
+
+        return self.max_length is None or len(word) <= self.max_length
 
 
     def __len__(self):
@@ -65,12 +227,10 @@ class Mangler():
         return int(length)
 
 
-    def chain_mutators(self, _input=None, mutators=None):
+    def chain_mutators(self, _input, mutators=None):
 
         if mutators is None:
-            mutators = self.mutators
-        if _input is None:
-            _input = self.perm()
+            mutators = self.mutators[1:]
 
         if len(mutators) == 0:
             return _input
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+import json
+import heapq
+from math import log
+from pathlib import Path
+from .utils import ReadFile
+from .errors import ModelError
+
+
+def ranked_product(options):
+    '''
+    lazily yields every combination of per-position options
+    in order of decreasing probability (increasing cost)
+
+    takes:      list of lists of (value, cost), each sorted by cost
+    yields:     joined values, cheapest combination first
+
+    each combination is reached by exactly one path
+    (only positions >= the last incremented one are incremented)
+    so no "seen" set is needed
+    '''
+
+    # only positions with more than one option can change
+    variable = [i for i, o in enumerate(options) if len(o) > 1]
+    start = tuple(0 for _ in options)
+    heap = [(sum(o[0][1] for o in options), start, 0)]
+
+    while heap:
+        cost, indexes, last = heapq.heappop(heap)
+        yield b''.join(options[i][j][0] for i, j in enumerate(indexes))
+
+        for v in range(last, len(variable)):
+            pos = variable[v]
+            j = indexes[pos]
+            if j + 1 < len(options[pos]):
+                new_indexes = indexes[:pos] + (j+1,) + indexes[pos+1:]
+                new_cost = cost - options[pos][j][1] + options[pos][j+1][1]
+                heapq.heappush(heap, (new_cost, new_indexes, v))
+
+
+
+class Model():
+    '''
+    per-position case and leet substitution statistics
+    learned from a list of cracked passwords
+    '''
+
+    # positions past this one share the same statistics
+    max_position = 16
+    # leet characters and the letters they replace
+    leet_chars = {
+        '4': 'a',
+        '@': 'a',
+        '8': 'b',
+        '3': 'e',
+        '1': 'il',
+        '0': 'o',
+        '5': 's',
+        '$': 's',
+        '7': 't',
+    }
+    # weight of the all-positions statistics when smoothing each position
+    prior_weight = 10
+
+    def __init__(self):
+
+        # [lowercase count, uppercase count] for each position
+        self.case = [[0, 0] for _ in range(self.max_position)]
+        # letter count for each position
+        self.letters = [dict() for _ in range(self.max_position)]
+        # letter --> leet char --> count for each position
+        self.subs = [dict() for _ in range(self.max_position)]
+
+
+    @classmethod
+    def train(cls, filename):
+
+        model = cls()
+        for password in ReadFile(filename):
+            model.learn(password.decode('utf-8', errors='ignore'))
+        return model
+
+
+    def learn(self, password):
+
+        for i, c in enumerate(password):
+            pos = min(i, self.max_position-1)
+
+            if c.isascii() and c.isalpha():
+                self.case[pos][int(c.isupper())] += 1
+                c = c.lower()
+                self.letters[pos][c] = self.letters[pos].get(c, 0) + 1
+
+            # only count leet characters next to a letter
+            # trailing digits are usually not substitutions
+            elif c in self.leet_chars and any(n.isalpha() for n in password[max(0, i-1):i+2]):
+                letters = self.leet_chars[c]
+                for letter in letters:
+                    subs = self.subs[pos].setdefault(letter, dict())
+                    subs[c] = subs.get(c, 0) + 1 / len(letters)
+
+
+    @classmethod
+    def load(cls, filename):
+
+        try:
+            with open(filename) as f:
+                data = json.load(f)
+            model = cls()
+            model.case = data['case']
+            model.letters = data['letters']
+            model.subs = data['subs']
+            assert len(model.case) == len(model.letters) == len(model.subs) == cls.max_position
+        except (OSError, ValueError, KeyError, AssertionError):
+            raise ModelError(f'Invalid model file: {filename}')
+        return model
+
+
+    def save(self, filename):
+
+        with open(filename, 'w') as f:
+            json.dump({'case': self.case, 'letters': self.letters, 'subs': self.subs}, f)
+
+
+    def case_options(self, word):
+        '''
+        returns [(variant, cost), ...] for each character in word
+        '''
+
+        total_upper = sum(u for l, u in self.case)
+        total = sum(l + u for l, u in self.case)
+        prior = (total_upper + 1) / (total + 2)
+
+        options = []
+        for i, c in enumerate(word):
+            c = bytes([c])
+            if not c.isalpha():
+                options.append([(c, 0.)])
+                continue
+            lower, upper = self.case[min(i, self.max_position-1)]
+            p_upper = (upper + self.prior_weight * prior) / (lower + upper + self.prior_weight)
+            options.append(sorted([(c.lower(), -log(1 - p_upper)), (c.upper(), -log(p_upper))], key=lambda x: x[1]))
+
+        return options
+
+
+    def leet_options(self, word, swap_values):
+        '''
+        returns [(variant, cost), ...] for each character in word
+        only substitutions present in swap_values are considered
+        '''
+
+        options = []
+        for i, c in enumerate(word):
+            c = bytes([c])
+            try:
+                swaps = swap_values[c]
+            except KeyError:
+                options.append([(c, 0.)])
+                continue
+
+            pos = min(i, self.max_position-1)
+            letter = c.decode().lower()
+            letters = self.letters[pos].get(letter, 0)
+            subs = self.subs[pos].get(letter, dict())
+            all_subs = self._all_positions(letter)
+
+            # smooth each position with the statistics for all positions
+            total = letters + sum(subs.values())
+            all_letters = sum(self.letters[p].get(letter, 0) for p in range(self.max_position))
+            all_total = all_letters + sum(all_subs.values())
+            choices = []
+            for variant in [c] + swaps:
+                if variant == c:
+                    count, all_count = letters, all_letters
+                else:
+                    count, all_count = subs.get(variant.decode(), 0), all_subs.get(variant.decode(), 0)
+                prior = (all_count + 1) / (all_total + len(swaps) + 1)
+                p = (count + self.prior_weight * prior) / (total + self.prior_weight)
+                choices.append((variant, -log(p)))
+
+            options.append(sorted(choices, key=lambda x: x[1]))
+
+        return options
+
+
+    def _all_positions(self, letter):
+
+        all_subs = dict()
+        for subs in self.subs:
+            for leet_char, count in subs.get(letter, dict()).items():
+                all_subs[leet_char] = all_subs.get(leet_char, 0) + count
+        return all_subs
+
+
+
+def evaluate(candidates, filename):
+    '''
+    counts how many candidates appear in a list of known passwords
+    returns (hits, candidates)
+    '''
+
+    if not Path(filename).is_file():
+        raise ModelError(f'Cannot find the file {filename}')
+
+    targets = set(ReadFile(filename))
+    hits = 0
+    total = 0
+    for candidate in candidates:
+        total += 1
+        if candidate in targets:
+            targets.discard(candidate)
+            hits += 1
+
+    return (hits, total)
@@ -32,7 +32,12 @@ class Mutator():
 
     def __iter__(self):
 
-        for word in self.input:
+        return self.gen(self.input)
+
+
+    def gen(self, _input):
+
+        for word in _input:
             self.cur_limit += self.limit
             for r in self.mutate(word):
                 if self.cur_limit > 0:
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+import os
+import stat
+from .errors import OutputError, CheckpointError
+
+
+def parse_bucket(s):
+    '''
+    parses "MIN-MAX:PATH" into (min_length, max_length, path)
+    e.g. "1-7:short.txt", "8-10:/tmp/fifo", "11-:long.txt", "8:eight.txt"
+    '''
+
+    try:
+        lengths, path = s.split(':', 1)
+        assert path
+        if '-' in lengths:
+            min_length, max_length = lengths.split('-', 1)
+            min_length = int(min_length) if min_length else None
+            max_length = int(max_length) if max_length else None
+        else:
+            min_length = max_length = int(lengths)
+    except (ValueError, AssertionError):
+        raise ValueError(f'Invalid bucket "{s}", use MIN-MAX:PATH')
+
+    return (min_length, max_length, path)
+
+
+
+class BucketWriter():
+    '''
+    writes each word to every file (or FIFO) whose length range it fits
+    each file has its own buffer which is flushed in large blocks
+    '''
+
+    def __init__(self, buckets, buffer_size=1024*1024, resume=None):
+        '''
+        resume (optional) is a list of (written, size) for each bucket from a checkpoint
+        regular files are truncated back to that size and appended to
+        '''
+
+        self.buckets = list(buckets)
+        self.buffer_size = buffer_size
+
+        self.files = []
+        for min_length, max_length, path in self.buckets:
+            try:
+                # opening a FIFO blocks until there's a reader
+                self.files.append(open(path, 'wb' if resume is None else 'ab', buffering=0))
+            except OSError as e:
+                raise OutputError(f'Cannot open {path}: {e}')
+
+        self.buffers = [bytearray() for _ in self.buckets]
+        self.written = [0 for _ in self.buckets]
+        # bytes written to each bucket, including what's still buffered
+        self.sizes = [0 for _ in self.buckets]
+
+        if resume is not None:
+            for i, (written, size) in enumerate(resume):
+                self.written[i] = written
+                self.sizes[i] = size
+                # FIFOs can't be truncated, anything after the checkpoint is repeated
+                st = os.fstat(self.files[i].fileno())
+                if stat.S_ISREG(st.st_mode):
+                    if st.st_size < size:
+                        raise CheckpointError(f'{self.buckets[i][2]} is shorter than the checkpoint')
+                    self.files[i].truncate(size)
+        # word length --> indexes of matching buckets
+        self.lookup = dict()
+
+
+    @property
+    def min_length(self):
+        '''
+        shortest length which fits in a bucket, None if there's no lower bound
+        '''
+
+        if any(b[0] is None or b[0] <= 1 for b in self.buckets):
+            return None
+        return min(b[0] for b in self.buckets)
+
+
+    @property
+    def max_length(self):
+        '''
+        longest length which fits in a bucket, None if there's no upper bound
+        '''
+
+        if any(b[1] is None for b in self.buckets):
+            return None
+        return max(b[1] for b in self.buckets)
+
+
+    def write(self, word):
+        '''
+        returns the number of buckets the word was written to
+        '''
+
+        length = len(word)
+        try:
+            indexes = self.lookup[length]
+        except KeyError:
+            indexes = self.lookup[length] = [
+                i for i, (min_length, max_length, path) in enumerate(self.buckets)
+                if (min_length is None or length >= min_length) and (max_length is None or length <= max_length)
+            ]
+
+        for i in indexes:
+            buf = self.buffers[i]
+            buf += word
+            buf += b'\n'
+            self.written[i] += 1
+            self.sizes[i] += length + 1
+            if len(buf) >= self.buffer_size:
+                self._flush(i)
+
+        return len(indexes)
+
+
+    def flush(self):
+
+        for i in range(len(self.buckets)):
+            self._flush(i)
+
+
+    def _flush(self, i):
+        '''
+        the files are unbuffered, so a write can be cut short (e.g. a FIFO
+        interrupted by a signal) and is repeated until everything is written
+        '''
+
+        buf = self.buffers[i]
+        if buf:
+            with memoryview(buf) as view:
+                written = 0
+                while written < len(view):
+                    written += self.files[i].write(view[written:])
+            buf.clear()
+
+
+    def close(self):
+
+        self.flush()
+        for f in self.files:
+            f.close()
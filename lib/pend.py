@@ -4,18 +4,58 @@
 
 import os
 from pathlib import Path
+from threading import Lock
 from .mutator import Mutator
 
 
+class Rules():
+    '''
+    parsed append/prepend rules
+    read from disk only as far as they're actually needed
+    '''
+
+    def __init__(self, reader):
+
+        self.rules = []
+        self.reader = reader
+        # rules can be shared between threads (e.g. lib.api.abatches)
+        self.lock = Lock()
+
+
+    def __iter__(self):
+
+        i = 0
+        while 1:
+            if i >= len(self.rules):
+                with self.lock:
+                    if i >= len(self.rules):
+                        try:
+                            self.rules.append(next(self.reader))
+                        except StopIteration:
+                            return
+            yield self.rules[i]
+            i += 1
+
+
+    def __len__(self):
+
+        with self.lock:
+            self.rules.extend(self.reader)
+        return len(self.rules)
+
+
+
 class Pend(Mutator):
 
     scale = 5
     fname = 'append/prepend'
+    # parsed rules for each rule directory, shared between instances
+    rule_cache = {}
 
-    def __init__(self, _input, limit=2048):
+    def __init__(self, _input, limit=2048, rule_dir=None):
 
-        self.rules = []
-        self.read_rules()
+        self.rule_dir = rule_dir
+        self._rules = None
 
         super().__init__(_input, limit)
 
@@ -25,6 +65,14 @@ class Pend(Mutator):
         return min(self.limit, len(self.rules))
 
 
+    @property
+    def rules(self):
+
+        if self._rules is None:
+            self._rules = self.read_rules(self.rule_dir)
+        return self._rules
+
+
     def mutate(self, word):
 
         yield word
@@ -38,16 +86,25 @@ class Pend(Mutator):
         if rule_dir is None:
             rule_dir = Path(__file__).resolve().parent.parent / 'lists'
 
+        try:
+            return self.rule_cache[rule_dir]
+        except KeyError:
+            rules = self.rule_cache[rule_dir] = Rules(self._read_rules(rule_dir))
+            return rules
+
+
+    def _read_rules(self, rule_dir):
+
         for _, _, files in os.walk(rule_dir):
             for file in files:
                 if any(file.lower().endswith(x) for x in ['rule', 'rules']):
                     with open(rule_dir / file) as f:
-                        lines = [l.strip('\r\n') for l in f.readlines()]
-                        for line in lines:
+                        for line in f:
+                            line = line.strip('\r\n')
                             try:
                                 rule = self.parse_rule(line)
                                 if len(rule) > 1:
-                                    self.rules.append(rule)
+                                    yield rule
                             except ValueError:
                                 continue
 
@@ -15,11 +15,13 @@ class Perm(Mutator):
 
     fname = 'perm'
 
-    def __init__(self, _input, perm_depth=0, double=False):
+    def __init__(self, _input, perm_depth=0, double=False, shard=None):
 
         self.perm_depth = perm_depth
         self.double = double
         self.input = _input
+        # (index, count) - only yield every count'th word, starting at index
+        self.shard = shard
 
         super().__init__(_input, limit=None)
 
@@ -42,6 +44,15 @@ class Perm(Mutator):
 
     def __iter__(self):
 
+        if self.shard is None:
+            yield from self._perm()
+        else:
+            index, count = self.shard
+            yield from itertools.islice(self._perm(), index, None, count)
+
+
+    def _perm(self):
+
         if self.perm_depth > 1:
             for d in range(1, self.perm_depth+1):
                 for p in itertools.product(self.input, repeat=d):
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+import os
+import json
+import socket
+import struct
+import asyncio
+import threading
+from sys import stderr
+from pathlib import Path
+from .mangler import Mangler
+from .model import Model
+from .utils import ReadFile, human_to_int
+from .errors import PasswordStretcherError, ServerError
+
+frame_header = struct.Struct('>I')
+# refuse job specs larger than this
+max_spec_size = 1024 * 1024
+
+# job spec key --> allowed types
+spec_types = {
+    'input':        (str,),
+    'leet':         (bool,),
+    'cap':          (bool,),
+    'capswap':      (bool,),
+    'pend':         (bool,),
+    'double':       (bool,),
+    'permutations': (int,),
+    'limit':        (int, str, type(None)),
+    'min_length':   (int, type(None)),
+    'max_length':   (int, type(None)),
+    'shard':        (list, type(None)),
+    'model':        (str, type(None)),
+    'adaptive':     (bool,),
+}
+
+
+def pack_frame(payload):
+
+    return frame_header.pack(len(payload)) + payload
+
+
+
+class CandidateServer():
+    '''
+    keeps wordlists and rule tables in memory
+    and serves candidate streams to multiple clients
+
+    framed protocol over a Unix-domain socket
+    each frame is a 4-byte big-endian length followed by the payload
+
+        client --> server:  one JSON frame containing the job spec
+        server --> client:  one JSON frame, either {"words": ...} or {"error": ...}
+                            then frames of newline-terminated candidates
+                            then an empty frame to mark the end of the job
+
+    job spec keys (all optional except "input"):
+        input, leet, cap, capswap, pend, double, permutations,
+        limit, min_length, max_length, shard ([index, count]), model, adaptive
+
+    reading wordlists and generating candidates happen in worker threads
+    so a large job doesn't hold up the others
+    '''
+
+    def __init__(self, socket_path, chunk_size=65536):
+
+        self.socket_path = str(socket_path)
+        self.chunk_size = chunk_size
+        # (filename, mtime, cap) --> Wordlist
+        self.wordlists = dict()
+        # (filename, mtime) --> Model
+        self.models = dict()
+        # cache key --> lock, so each file is only loaded once at a time
+        self.loading = dict()
+        self.lock = threading.Lock()
+        self.jobs = 0
+
+
+    def serve_forever(self):
+
+        asyncio.run(self.serve())
+
+
+    async def serve(self):
+
+        # remove stale socket from a previous run
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+        server = await asyncio.start_unix_server(self.handle, path=self.socket_path)
+        stderr.write(f'[+] Serving candidates on {self.socket_path}\n')
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+
+    async def handle(self, reader, writer):
+
+        self.jobs += 1
+        job_id = self.jobs
+        loop = asyncio.get_running_loop()
+        started = False
+
+        try:
+            spec = await self.read_spec(reader)
+            mangler = await loop.run_in_executor(None, self.mangler, spec)
+            stderr.write(f'[+] Job #{job_id}: {spec["input"]} ({len(mangler.input):,} words)\n')
+            writer.write(pack_frame(json.dumps({
+                'words': len(mangler.input),
+                'limits': {str(m): m.limit for m in mangler.mutators[1:]},
+            }).encode('utf-8')))
+            started = True
+
+            written_count = 0
+            chunks = self.chunks(mangler)
+            while 1:
+                chunk, count = await loop.run_in_executor(None, next, chunks, (None, 0))
+                if chunk is None:
+                    break
+                writer.write(pack_frame(chunk))
+                written_count += count
+                await writer.drain()
+
+            writer.write(pack_frame(b''))
+            await writer.drain()
+            stderr.write(f'[+] Job #{job_id}: {written_count:,} words sent\n')
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            stderr.write(f'[!] Job #{job_id}: client disconnected\n')
+
+        except Exception as e:
+            if not isinstance(e, PasswordStretcherError):
+                e = f'{e.__class__.__name__}: {e}'
+            stderr.write(f'[!] Job #{job_id}: {e}\n')
+            # once candidates are being sent, closing the connection early is the only signal
+            if not started:
+                writer.write(pack_frame(json.dumps({'error': str(e)}).encode('utf-8')))
+                await writer.drain()
+
+        finally:
+            writer.close()
+
+
+    def chunks(self, mangler):
+        '''
+        yields (newline-terminated candidates, number of candidates) in chunks of about self.chunk_size
+        '''
+
+        chunk = []
+        chunk_len = 0
+        for mangled_word in mangler:
+            chunk.append(mangled_word)
+            chunk_len += len(mangled_word) + 1
+            if chunk_len >= self.chunk_size:
+                yield (b'\n'.join(chunk) + b'\n', len(chunk))
+                chunk.clear()
+                chunk_len = 0
+
+        if chunk:
+            yield (b'\n'.join(chunk) + b'\n', len(chunk))
+
+
+    async def read_spec(self, reader):
+
+        size, = frame_header.unpack(await reader.readexactly(frame_header.size))
+        if size > max_spec_size:
+            raise ServerError(f'Job spec too large ({size:,} bytes)')
+
+        try:
+            spec = json.loads(await reader.readexactly(size))
+            assert type(spec) == dict and 'input' in spec
+        except (ValueError, AssertionError):
+            raise ServerError('Invalid job spec')
+
+        return spec
+
+
+    @staticmethod
+    def check_spec(spec):
+
+        for key, value in spec.items():
+            try:
+                types = spec_types[key]
+            except KeyError:
+                raise ServerError(f'Unknown job spec key: "{key}"')
+            # bool is a subclass of int
+            if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+                raise ServerError(f'Invalid value for "{key}": {json.dumps(value)}')
+
+        try:
+            shard = spec.get('shard', None)
+            if shard is not None:
+                index, count = [int(i) for i in shard]
+                assert 0 <= index < count
+                shard = (index, count)
+        except (ValueError, TypeError, AssertionError):
+            raise ServerError(f'Invalid shard: {spec.get("shard")}')
+
+        limit = spec.get('limit', None)
+        if type(limit) == str:
+            try:
+                limit = human_to_int(limit)
+            except ValueError:
+                raise ServerError(f'Invalid value for "limit": {json.dumps(limit)}')
+
+        return shard, limit
+
+
+    def mangler(self, spec):
+
+        shard, limit = self.check_spec(spec)
+        cap = spec.get('cap', False)
+        capswap = spec.get('capswap', False)
+
+        return Mangler(
+            _input=self.wordlist(spec['input'], cap=(cap and not capswap)),
+            output_size=limit,
+            double=spec.get('double', False),
+            perm=spec.get('permutations', 1),
+            leet=spec.get('leet', False),
+            cap=cap,
+            capswap=capswap,
+            pend=spec.get('pend', False),
+            min_length=spec.get('min_length', None),
+            max_length=spec.get('max_length', None),
+            shard=shard,
+            model=self.model(spec.get('model', None)),
+            adaptive=spec.get('adaptive', False),
+        )
+
+
+    def wordlist(self, filename, cap=False):
+        '''
+        reads and deduplicates a wordlist only once
+        it's read again if the file changes
+        '''
+
+        _input = ReadFile(filename)
+        key = (str(Path(filename).resolve()), os.stat(filename).st_mtime, cap)
+
+        def load():
+            # forget older versions of the same file
+            for k in [k for k in self.wordlists if k[0] == key[0]]:
+                del self.wordlists[k]
+            return Mangler.read_input(_input, cap=cap)
+
+        return self.cached(self.wordlists, key, load)
+
+
+    def model(self, filename):
+
+        if filename is None:
+            return None
+
+        try:
+            key = (str(Path(filename).resolve()), os.stat(filename).st_mtime)
+        except OSError:
+            raise ServerError(f'Cannot find the model {filename}')
+
+        return self.cached(self.models, key, lambda: Model.load(filename))
+
+
+    def cached(self, cache, key, load):
+        '''
+        returns cache[key], calling load() to fill it in if needed
+        jobs which need the same file wait for the first one to load it
+        '''
+
+        with self.lock:
+            lock = self.loading.setdefault(key, threading.Lock())
+
+        with lock:
+            try:
+                return cache[key]
+            except KeyError:
+                cache[key] = load()
+                return cache[key]
+
+
+
+def request_candidates(socket_path, spec):
+    '''
+    sends a job spec to a CandidateServer
+    yields chunks of newline-terminated candidates
+    '''
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(str(socket_path))
+        except OSError as e:
+            raise ServerError(f'Cannot connect to {socket_path}: {e}')
+
+        s.sendall(pack_frame(json.dumps(spec).encode('utf-8')))
+
+        with s.makefile('rb') as f:
+            header = json.loads(_read_frame(f))
+            if 'error' in header:
+                raise ServerError(header['error'])
+
+            while 1:
+                chunk = _read_frame(f)
+                if not chunk:
+                    break
+                yield chunk
+
+
+
+def _read_frame(f):
+
+    header = f.read(frame_header.size)
+    if len(header) != frame_header.size:
+        raise ServerError('Connection closed by server')
+    size, = frame_header.unpack(header)
+    payload = f.read(size)
+    if len(payload) != size:
+        raise ServerError('Connection closed by server')
+    return payload
@@ -4,8 +4,12 @@
 
 import re
 import requests
+import threading
 import urllib.parse
 from sys import stderr
+from time import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from .utils import url_to_domain
 from .errors import SpiderError
 from html.parser import HTMLParser
@@ -25,7 +29,8 @@ class Parser(HTMLParser):
         # track occurrences of each word
         self.words = dict()
         # stores each responses' links to other pages
-        self.temp_links = set()
+        # (a dict keeps them in page order, unlike a set)
+        self.temp_links = dict()
 
         super().__init__()
 
@@ -73,65 +78,361 @@ class Parser(HTMLParser):
         if tag == 'a':
             for attr, value in attrs:
                 if attr == 'href' and value:
-                    self.temp_links.add(value)
+                    self.temp_links[value] = None
 
 
 
 
-class Spider:
+class BaseSpider():
+    '''
+    shared by Spider and MultiSpider
+    subclasses implement start() and the "frontier" of pages still to visit
+    '''
 
-    def __init__(self, url, depth=2):
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Ubuntu Chromium/75.0.3770.90 Chrome/75.0.3770.90 Safari/537.36',
+    }
+
+    def __init__(self, urls, depth=2):
+
+        self.urls = list(urls)
+        for url in self.urls:
+            try:
+                assert url.startswith(('http://', 'https://'))
+                url_to_domain(url)
+            except (AssertionError, ValueError):
+                raise SpiderError(f'Invalid URL: "{url}"')
 
-        self.url = url
-        self.base_domain = url_to_domain(url)
-        self.session = requests.Session()
         self.parser = Parser()
         self.visited = set()
         self.depth = depth
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Ubuntu Chromium/75.0.3770.90 Chrome/75.0.3770.90 Safari/537.36',
+
+
+    def start(self, checkpoint=None):
+        '''
+        override in child class
+        '''
+        pass
+
+
+    @property
+    def frontier(self):
+        '''
+        override in child class
+        '''
+        return []
+
+
+    def state(self):
+
+        return {
+            'visited': list(self.visited),
+            'frontier': [list(f) for f in self.frontier],
+            'words': self.parser.words,
         }
 
 
-    def start(self):
+    def restore(self, state):
+
+        self.visited = set(state['visited'])
+        self.parser.words = dict(state['words'])
+
+
+    def __iter__(self):
+
+        words = list(self.parser.words.items())
+        words.sort(key=lambda x: x[1], reverse=True)
+
+        for word, count in words:
+            yield word.encode('utf-8')
+
+
+
+class Spider(BaseSpider):
+
+    def __init__(self, url, depth=2):
+
+        super().__init__([url], depth=depth)
+        self.url = url
+        self.base_domain = url_to_domain(url)
+        self.session = requests.Session()
+        # stack of (url, depth) still to be visited
+        self.stack = []
+
+
+    @property
+    def frontier(self):
+
+        return self.stack
+
+
+    def start(self, checkpoint=None):
+        '''
+        crawls until the frontier is empty
+        checkpoint (optional) is called with the spider after each page,
+        in which case KeyboardInterrupt is re-raised with the frontier intact
+        '''
+
+        if not self.stack and not self.visited:
+            self.stack.append((self.url, self.depth))
 
         try:
-            self.get(self.url)
+            while self.stack:
+                self.get()
+                if checkpoint is not None:
+                    checkpoint(self)
             stderr.write('\n')
             stderr.flush()
         except requests.RequestException:
-            raise SpiderError(f'Error visiting URL: "{self.url}"')
+            raise SpiderError(f'Error visiting URL: "{self.stack[-1][0]}"')
         except KeyboardInterrupt:
             stderr.write('\n\n[!] Stopping spider...\n')
+            # with a checkpoint, the frontier is kept so the crawl can be resumed
+            if checkpoint is not None:
+                raise
+            self.stack.clear()
 
 
-    def get(self, url, depth=None):
+    def get(self):
+        '''
+        visits the next page in the frontier (depth-first)
+        the page stays in the frontier until it's been fetched
+        '''
 
-        if depth is None:
-            depth = self.depth
+        url, depth = self.stack[-1]
 
         if not url in self.visited and depth > 0:
 
             response = self.session.get(url, headers=self.headers)
+            self.stack.pop()
             self.visited.add(url)
             links = self.parser.injest(response.text)
 
+            new_links = []
             for link in links:
                 link = urllib.parse.urljoin(url, link)
                 try:
                     if url_to_domain(link) == self.base_domain:
-                        self.get(link, depth=depth-1)
+                        new_links.append((link, depth-1))
                 except ValueError:
                     continue
 
+            # reversed so the first link is visited first
+            self.stack.extend(reversed(new_links))
+
+        else:
+            self.stack.pop()
+
         stderr.write(f'\r[+] Found {len(self.parser.words):,} words in {len(self.visited):,} pages')
 
 
+    def restore(self, state):
 
-    def __iter__(self):
+        super().restore(state)
+        self.stack = [tuple(f) for f in state['frontier']]
 
-        words = list(self.parser.words.items())
-        words.sort(key=lambda x: x[1], reverse=True)
 
-        for word, count in words:
-            yield word.encode('utf-8')
\ No newline at end of file
+
+class MultiSpider(BaseSpider):
+    '''
+    crawls many sites at once with a shared pool of worker threads
+    word counts from every site are merged into one frequency-ranked list
+
+    each domain has at most one request in flight, and waits self.delay
+    seconds between requests
+    each site is crawled breadth-first and only within its own domain
+    '''
+
+    # seconds before a request is given up on
+    timeout = 30
+
+    def __init__(self, urls, depth=2, threads=8, delay=0.5):
+
+        super().__init__(urls, depth=depth)
+        self.threads = threads
+        self.delay = delay
+        self.errors = 0
+
+        # domain --> queue of (url, depth, domain) still to be visited
+        self.queues = dict()
+        # every URL which has been visited or queued
+        self.seen = set()
+        # future --> (url, depth, domain)
+        self.in_flight = dict()
+        # domains with a request in flight
+        self.busy = set()
+        # domain --> time when the next request is allowed
+        self.ready_at = dict()
+
+        self.local = threading.local()
+
+
+    @staticmethod
+    def read_urls(filename):
+        '''
+        reads a file with one URL per line
+        empty lines and lines starting with "#" are skipped
+        '''
+
+        urls = []
+        try:
+            with open(filename, encoding='utf-8', errors='ignore') as f:
+                for i, line in enumerate(f):
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        if not line.startswith(('http://', 'https://')):
+                            raise SpiderError(f'Invalid URL on line {i+1:,} of {filename}: "{line}"')
+                        urls.append(line)
+        except OSError as e:
+            raise SpiderError(f'Cannot read URLs from {filename}: {e}')
+
+        if not urls:
+            raise SpiderError(f'No URLs found in {filename}')
+        return urls
+
+
+    @property
+    def frontier(self):
+        '''
+        pages still to be visited, including the ones being fetched
+        '''
+
+        frontier = list(self.in_flight.values())
+        for queue in self.queues.values():
+            frontier.extend(queue)
+        return frontier
+
+
+    def start(self, checkpoint=None):
+        '''
+        crawls until every site's frontier is empty
+        checkpoint (optional) is called with the spider after each page,
+        in which case KeyboardInterrupt is re-raised with the frontier intact
+        '''
+
+        if not self.queues and not self.visited:
+            for url in self.urls:
+                self.enqueue(url, self.depth, url_to_domain(url))
+
+        pool = ThreadPoolExecutor(max_workers=self.threads)
+        try:
+            while self.queues or self.in_flight:
+                self.submit(pool)
+                done, _ = wait(self.in_flight, timeout=self.next_ready(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.finish(future)
+                    if checkpoint is not None:
+                        checkpoint(self)
+            stderr.write('\n')
+            if self.errors:
+                stderr.write(f'[!] {self.errors:,} pages could not be fetched\n')
+            stderr.flush()
+        except KeyboardInterrupt:
+            stderr.write('\n\n[!] Stopping spider...\n')
+            # with a checkpoint, the frontier is kept so the crawl can be resumed
+            if checkpoint is not None:
+                raise
+            self.queues.clear()
+            self.in_flight.clear()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+    def enqueue(self, url, depth, domain):
+
+        if depth > 0 and url not in self.seen:
+            self.seen.add(url)
+            try:
+                self.queues[domain].append((url, depth, domain))
+            except KeyError:
+                self.queues[domain] = deque([(url, depth, domain)])
+
+
+    def submit(self, pool):
+        '''
+        starts a request for each domain which is ready, while there are free workers
+        '''
+
+        now = time()
+        for domain in list(self.queues):
+            if len(self.in_flight) >= self.threads:
+                break
+            if domain in self.busy or self.ready_at.get(domain, 0) > now:
+                continue
+
+            queue = self.queues.pop(domain)
+            url, depth, domain = queue.popleft()
+            # move to the back so domains take turns
+            if queue:
+                self.queues[domain] = queue
+
+            self.busy.add(domain)
+            self.in_flight[pool.submit(self.fetch, url)] = (url, depth, domain)
+
+
+    def next_ready(self):
+        '''
+        seconds until a waiting domain can be sent its next request
+        None if there's nothing to do until a request finishes
+        '''
+
+        if len(self.in_flight) >= self.threads:
+            return None
+
+        now = time()
+        delays = [self.ready_at.get(domain, 0) - now for domain in self.queues if domain not in self.busy]
+        if delays:
+            return max(0, min(delays))
+        return None
+
+
+    def fetch(self, url):
+        '''
+        runs in a worker thread, each of which has its own session
+        '''
+
+        try:
+            session = self.local.session
+        except AttributeError:
+            session = self.local.session = requests.Session()
+
+        return session.get(url, headers=self.headers, timeout=self.timeout).text
+
+
+    def finish(self, future):
+        '''
+        parses a fetched page (in the main thread) and queues its links
+        '''
+
+        url, depth, domain = self.in_flight.pop(future)
+        self.busy.discard(domain)
+        self.ready_at[domain] = time() + self.delay
+
+        try:
+            html = future.result()
+        except requests.RequestException:
+            # one unreachable site shouldn't stop the others
+            self.errors += 1
+            stderr.write(f'\n[!] Error visiting URL: "{url}"\n')
+            return
+
+        self.visited.add(url)
+        for link in self.parser.injest(html):
+            link = urllib.parse.urljoin(url, link)
+            try:
+                if url_to_domain(link) == domain:
+                    self.enqueue(link, depth-1, domain)
+            except ValueError:
+                continue
+
+        stderr.write(f'\r[+] Found {len(self.parser.words):,} words in {len(self.visited):,} pages from {len(self.urls):,} sites')
+
+
+    def restore(self, state):
+
+        super().restore(state)
+        self.seen = set(self.visited)
+        self.queues.clear()
+        self.in_flight.clear()
+        for url, depth, domain in state['frontier']:
+            self.enqueue(url, depth, domain)
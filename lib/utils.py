@@ -39,6 +39,18 @@ class ReadFile():
 
 
 
+class Wordlist(list):
+    '''
+    deduplicated input words, sorted by length
+    can be kept in memory and handed to multiple Manglers
+
+    self.cap is True if the basic cap mutations have been applied
+    '''
+
+    cap = False
+
+
+
 class ReadSTDIN():
 
     def __iter__(self):
@@ -8,16 +8,22 @@ by TheTechromancer
 
 import os
 import sys
-from time import sleep
+import stat
+from time import sleep, time
 from lib.utils import *
 from lib.errors import *
 from lib.mangler import *
-from lib.spider import Spider
+from lib.output import parse_bucket
+from lib.hash_types import hash_lengths
+from lib.checkpoint import StopSignal
 from argparse import ArgumentParser, ArgumentError
 
+# the other subsystems (spider, hasher, server, etc.) are imported only
+# when their flags are used, to keep startup fast for small jobs
 
 
-def stretcher(options):
+
+def stretcher(options, checkpoint=None):
 
     if options.min_length is not None and options.max_length is not None:
         if options.min_length > options.max_length:
@@ -27,9 +33,60 @@ def stretcher(options):
     show_written_count = not sys.stdout.isatty()
     written_count = 0
 
+    # output state from the checkpoint, if we're resuming
+    resume = None
+    if checkpoint is not None and options.resume:
+        resume = checkpoint.state['output']
+
+    min_length = options.min_length
+    max_length = options.max_length
+    buckets = None
+    if options.bucket:
+        # before opening (and truncating) any of the files
+        if options.hashes or options.evaluate:
+            raise OutputError('--bucket only works when writing candidates (not with --hashes or --evaluate)')
+        from lib.output import BucketWriter
+        buckets = BucketWriter(options.bucket, resume=None if resume is None else resume['buckets'])
+        # words which don't fit in any bucket count against the output size
+        if min_length is None:
+            min_length = buckets.min_length
+        if max_length is None:
+            max_length = buckets.max_length
+        show_written_count = True
+
+    _input = options.input
+    manifest = None
+    if options.delta:
+        # otherwise words which were only hashed or evaluated would be skipped next time
+        if options.hashes or options.evaluate:
+            raise DeltaError('Delta mode only works when writing candidates (not with --hashes or --evaluate)')
+        if options.permutations > 1:
+            raise DeltaError('Delta mode cannot be combined with permutations')
+        if options.adaptive:
+            raise DeltaError('Delta mode reuses the previous limits and cannot be combined with --adaptive')
+        from lib.delta import Manifest
+        manifest = Manifest(options.delta, flags={
+            'leet': options.leet,
+            'cap': options.cap,
+            'capswap': options.capswap,
+            'pend': options.pend,
+            'double': options.double,
+            'min_length': options.min_length,
+            'max_length': options.max_length,
+            'model': options.model,
+        })
+        _input = manifest.filter(_input)
+
+    model = None
+    if options.model:
+        from lib.model import Model
+        model = Model.load(options.model)
+        if not (options.leet or options.capswap):
+            sys.stderr.write('[!] --model only affects --leet and --capswap\n')
+
     sys.stderr.write('[+] Reading input wordlist...')
     mangler = Mangler(
-        _input=options.input,
+        _input=_input,
         output_size=options.limit,
         double=options.double,
         perm=options.permutations,
@@ -37,42 +94,261 @@ def stretcher(options):
         cap=options.cap,
         capswap=options.capswap,
         pend=options.pend,
+        min_length=min_length,
+        max_length=max_length,
+        model=model,
+        adaptive=options.adaptive,
     )
     sys.stderr.write(f' read {len(mangler.input):,} words {"(after basic cap mutations)" if (options.cap and not options.capswap) else ""}\n')
+    if manifest is not None:
+        manifest.apply(mangler)
+        sys.stderr.write(f'[*] Delta mode: {len(manifest.new_words):,} new words since last run\n')
     if options.permutations > 1:
         sys.stderr.write(f'[*] Input wordlist after permutations: {len(mangler.mutators[0]):,}\n')
+    elif manifest is not None and manifest.limits is not None:
+        sys.stderr.write(f'[*] Reusing per-word limits from {options.delta}\n')
     else:
-        sys.stderr.write(f'[*] Output capped at {mangler.output_size:,} words\n')
+        sys.stderr.write(f'[*] Output capped at {mangler.output_size:,} words{" (adaptive)" if options.adaptive else ""}\n')
     if any([mangler.leet, mangler.cap, mangler.pend]):
-        sys.stderr.write('[+] Mutations allowed per word:\n')
+        sys.stderr.write(f'[+] Mutations allowed per word{" (initial)" if options.adaptive else ""}:\n')
         for mutator in mangler.mutators[1:]:
             sys.stderr.write(f'       {str(mutator):<16}{mutator.limit:,}\n')
-    if options.min_length is not None:
-        sys.stderr.write(f'[+] Discarding words shorter than {options.min_length:,} characters, output size may be reduced\n')
-    if options.max_length is not None:
-        sys.stderr.write(f'[+] Discarding words longer than {options.max_length:,} characters, output size may be reduced\n')
+    if min_length is not None:
+        sys.stderr.write(f'[+] Discarding words shorter than {min_length:,} characters, output size may be reduced\n')
+    if max_length is not None:
+        sys.stderr.write(f'[+] Discarding words longer than {max_length:,} characters, output size may be reduced\n')
 
     #sys.stderr.write(f'[+] Estimated output: {len(mangler):,} words\n')
 
-    bytes_written = 0
-    for mangled_word in mangler:
+    if resume is not None:
+        mangler.restore(checkpoint.state['mangler'])
+        written_count = resume['written_count']
+        sys.stderr.write(f'[*] Resuming after {written_count:,} words\n')
 
-        if (options.min_length is None or len(mangled_word) >= options.min_length) and \
-            (options.max_length is None or len(mangled_word) <= options.max_length):
+    if options.hashes:
+        crack(mangler, options)
 
-            sys.stdout.buffer.write(mangled_word + b'\n')
-            bytes_written += (len(mangled_word)+1)
-            if show_written_count and written_count % 10000 == 0:
-                sys.stderr.write(f'\r[+] {written_count:,} words written ({bytes_to_human(bytes_written)})    ')
+    elif options.evaluate:
+        from lib.model import evaluate
+        hits, total = evaluate(mangler, options.evaluate)
+        sys.stderr.write(f'[+] {hits:,} hits from {total:,} candidates ({hits / max(total, 1) * 100:.4f}% hit rate per candidate)\n')
 
-            written_count += 1
+    elif buckets is not None:
+        write_buckets(mangler, buckets, checkpoint=checkpoint, written_count=written_count)
 
-        else:
-            # if the word didn't meet length requirements, increase the limit by 1
-            mangler.mutators[-1].cur_limit += 1
+    else:
+        bytes_written = 0
+        if resume is not None:
+            bytes_written = resume['bytes_written']
+            resume_stdout(bytes_written)
+
+        def save():
+            sys.stdout.buffer.flush()
+            checkpoint.save(mangler=mangler.state(), output={
+                'written_count': written_count,
+                'bytes_written': bytes_written,
+            })
+
+        with StopSignal(enabled=checkpoint is not None) as stop:
+            if checkpoint is not None:
+                mangler.on_word = lambda: check_stop(stop, checkpoint, save)
+
+            for mangled_word in mangler:
+
+                sys.stdout.buffer.write(mangled_word + b'\n')
+                bytes_written += (len(mangled_word)+1)
+                if show_written_count and written_count % 10000 == 0:
+                    sys.stderr.write(f'\r[+] {written_count:,} words written ({bytes_to_human(bytes_written)})    ')
+
+                written_count += 1
+
+                if checkpoint is not None and (stop.requested or written_count % 1000 == 0):
+                    check_stop(stop, checkpoint, save)
+
+        if show_written_count:
+            sys.stderr.write(f'\r[+] {written_count:,} words written ({bytes_to_human(bytes_written)})    \n')
+
+        sys.stdout.buffer.flush()
+        sys.stdout.close()
+
+    if checkpoint is not None:
+        checkpoint.remove()
+
+    if manifest is not None:
+        manifest.write(mangler)
 
-    if show_written_count:
-        sys.stderr.write(f'\r[+] {written_count:,} words written ({bytes_to_human(bytes_written)})    \n')
+
+
+def write_buckets(mangler, buckets, checkpoint=None, written_count=0):
+    '''
+    writes each word to the output file(s) matching its length
+    '''
+
+    discarded_count = 0
+    def save():
+        buckets.flush()
+        checkpoint.save(mangler=mangler.state(), output={
+            'written_count': written_count,
+            'buckets': list(zip(buckets.written, buckets.sizes)),
+        })
+
+    with StopSignal(enabled=checkpoint is not None) as stop:
+        if checkpoint is not None:
+            mangler.on_word = lambda: check_stop(stop, checkpoint, save)
+
+        for mangled_word in mangler:
+
+            if buckets.write(mangled_word):
+                written_count += 1
+                if written_count % 10000 == 0:
+                    sys.stderr.write(f'\r[+] {written_count:,} words written    ')
+                if checkpoint is not None and (stop.requested or written_count % 1000 == 0):
+                    check_stop(stop, checkpoint, save)
+            else:
+                discarded_count += 1
+
+    buckets.close()
+
+    sys.stderr.write(f'\r[+] {written_count:,} words written    \n')
+    for (min_length, max_length, path), count in zip(buckets.buckets, buckets.written):
+        length_range = f'{"" if min_length is None else min_length}-{"" if max_length is None else max_length}'
+        sys.stderr.write(f'       {length_range:<8}{count:>14,}  {path}\n')
+    if discarded_count:
+        sys.stderr.write(f'[+] {discarded_count:,} words didn\'t fit in any bucket\n')
+
+
+
+def check_stop(stop, checkpoint, save):
+    '''
+    saves a checkpoint if one is due, or if a stop was requested
+    (in which case KeyboardInterrupt is raised afterwards)
+    '''
+
+    if stop.requested or checkpoint.due():
+        save()
+        if stop.requested:
+            raise KeyboardInterrupt
+
+
+
+def resume_stdout(offset):
+    '''
+    truncates the output back to the last checkpoint, if it's a regular file
+    '''
+
+    fd = sys.stdout.fileno()
+    st = os.fstat(fd)
+    if stat.S_ISREG(st.st_mode):
+        if st.st_size < offset:
+            raise CheckpointError('Output file is shorter than the checkpoint, use ">>" to append to it when resuming')
+        os.ftruncate(fd, offset)
+        os.lseek(fd, offset, os.SEEK_SET)
+    else:
+        sys.stderr.write('[!] Output is not a regular file, anything written after the last checkpoint will be repeated\n')
+
+
+
+def crawl(spider, checkpoint=None):
+    '''
+    spiders the website, saving checkpoints along the way if requested
+    SIGINT / SIGTERM save the frontier so the crawl can be resumed
+    '''
+
+    if checkpoint is None:
+        spider.start()
+        return
+
+    if checkpoint.state['spider'] is not None:
+        spider.restore(checkpoint.state['spider'])
+        frontier = checkpoint.state['spider']['frontier']
+        if not frontier:
+            sys.stderr.write(f'[*] Spider already finished, {len(spider.parser.words):,} words restored from checkpoint\n')
+            return
+        sys.stderr.write(f'[*] Resuming spider with {len(frontier):,} pages left in the frontier\n')
+
+    with StopSignal() as stop:
+        save = lambda: checkpoint.save(spider=spider.state())
+        # called after each page, raises KeyboardInterrupt once the frontier is saved
+        spider.start(checkpoint=lambda spider: check_stop(stop, checkpoint, save))
+        save()
+        if stop.requested:
+            raise KeyboardInterrupt
+
+
+
+def checkpoint_flags(options):
+    '''
+    options which must match when resuming from a checkpoint
+    '''
+
+    if type(options.input) == ReadFile:
+        _input = {'file': os.path.abspath(options.input.filename), 'size': os.path.getsize(options.input.filename)}
+    elif hasattr(options.input, 'start'):
+        _input = {'urls': options.input.urls, 'spider_depth': options.spider_depth}
+    else:
+        raise CheckpointError('--checkpoint needs a wordlist file or website as input (not STDIN)')
+
+    flags = {'input': _input}
+    for option in ['leet', 'cap', 'capswap', 'pend', 'double', 'permutations', 'min_length', 'max_length', 'limit', 'adaptive', 'model', 'bucket', 'delta']:
+        flags[option] = getattr(options, option)
+    return flags
+
+
+
+def crack(mangler, options):
+    '''
+    hashes candidates in-process and prints only hits as "hash:plain"
+    '''
+
+    from lib.hasher import Hasher
+    hasher = Hasher(options.hashes, hash_type=options.hash_type, processes=options.processes)
+    sys.stderr.write(f'[+] Loaded {len(hasher.targets):,} {hasher.hash_type} hashes, cracking with {hasher.processes:,} processes\n')
+
+    for _hash, plain in hasher.crack(mangler):
+        sys.stdout.buffer.write(_hash.encode('utf-8') + b':' + plain + b'\n')
+        sys.stdout.buffer.flush()
+
+    if not hasher.targets:
+        sys.stderr.write('[+] All hashes cracked, stopping early\n')
+    sys.stderr.write(f'[+] Cracked {hasher.cracked:,} hashes, {hasher.hashed:,} candidates tried in {hasher.elapsed:.2f}s\n')
+    sys.stderr.write(f'[+] Throughput: {int_to_human(hasher.rate)}H/s (including candidate generation)\n')
+
+
+
+def connect(options):
+    '''
+    requests candidates from a running --serve instance
+    '''
+
+    if type(options.input) != ReadFile:
+        raise ServerError('--connect requires a wordlist file as input')
+
+    spec = {
+        'input': os.path.abspath(options.input.filename),
+        'leet': options.leet,
+        'cap': options.cap,
+        'capswap': options.capswap,
+        'pend': options.pend,
+        'double': options.double,
+        'permutations': options.permutations,
+        'limit': options.limit,
+        'min_length': options.min_length,
+        'max_length': options.max_length,
+        'adaptive': options.adaptive,
+        'model': os.path.abspath(options.model) if options.model else None,
+    }
+
+    start_time = time()
+    first_chunk_time = None
+    bytes_written = 0
+    from lib.server import request_candidates
+    for chunk in request_candidates(options.connect, spec):
+        if first_chunk_time is None:
+            first_chunk_time = time() - start_time
+        sys.stdout.buffer.write(chunk)
+        bytes_written += len(chunk)
+
+    sys.stderr.write(f'[+] Received {bytes_to_human(bytes_written)} in {time() - start_time:.2f}s (first candidates after {(first_chunk_time or 0) * 1000:.1f}ms)\n')
 
     sys.stdout.buffer.flush()
     sys.stdout.close()
@@ -95,23 +371,83 @@ if __name__ == '__main__':
     parser.add_argument('-m',       '--min-length',     type=int,                                   help='minimum password length (for output)', metavar='INT')
     parser.add_argument('-M',       '--max-length',     type=int,                                   help='maximum password length (for output)', metavar='INT')
     parser.add_argument('--limit',                      type=human_to_int,                          help='limit length of output (default: max(100M, 1000x input))')
+    parser.add_argument('--adaptive',                   action='store_true',                        help='adjust mutations per word during the run so output lands on --limit')
     parser.add_argument('--spider-depth',               type=int,               default=1,          help='maximum website spider depth (default: 1)')
+    parser.add_argument('--url-list',                   action='store_true',                        help='input file is a list of websites to spider together (one URL per line)')
+    parser.add_argument('--spider-threads',             type=int,               default=8,          help='worker threads shared by all sites with --url-list (default: 8)', metavar='INT')
+    parser.add_argument('--spider-delay',               type=float,             default=0.5,        help='seconds between requests to the same domain with --url-list (default: 0.5)', metavar='SECONDS')
+    parser.add_argument('--bucket',                     type=parse_bucket,      action='append',    help='write words of this length to a separate file or FIFO (e.g. 1-7:short.txt, 11-:long.txt), can be repeated', metavar='MIN-MAX:PATH')
+    parser.add_argument('--hashes',                                                                 help='crack unsalted hashes from this file in-process instead of printing candidates', metavar='FILE')
+    parser.add_argument('--hash-type',                  choices=list(hash_lengths),    default='md5',  help='hash type for --hashes (default: md5)')
+    parser.add_argument('--processes',                  type=int,                                   help='worker processes for --hashes (default: number of CPUs)', metavar='INT')
+    parser.add_argument('--serve',                                                                  help='keep rules & wordlists in memory and serve candidates on this Unix socket', metavar='SOCKET')
+    parser.add_argument('--connect',                                                                help='request candidates from a --serve instance listening on this Unix socket', metavar='SOCKET')
+    parser.add_argument('--train',                                                                  help='learn case & leet statistics from a list of cracked passwords (saved to --model)', metavar='FILE')
+    parser.add_argument('--model',                                                                  help='order --leet and --capswap variants by probability using this model', metavar='FILE')
+    parser.add_argument('--evaluate',                                                               help='instead of printing, report hit rate against this list of known passwords', metavar='FILE')
+    parser.add_argument('--checkpoint',                                                             help='periodically save progress to this file so the job can be resumed', metavar='FILE')
+    parser.add_argument('--resume',                     action='store_true',                        help='continue from the file given by --checkpoint')
+    parser.add_argument('--delta',                                                                  help='only stretch words not seen in previous runs (manifest is kept in this file)', metavar='FILE')
 
     try:
 
         options = parser.parse_args()
 
+        if options.serve:
+            from lib.server import CandidateServer
+            CandidateServer(options.serve).serve_forever()
+            sys.exit()
+
+        elif options.train:
+            if not options.model:
+                raise ModelError('Please specify where to save the model with --model')
+            from lib.model import Model
+            sys.stderr.write(f'[+] Training model from {options.train}...')
+            Model.train(options.train).save(options.model)
+            sys.stderr.write(f' saved to {options.model}\n')
+            sys.exit()
+
         # print help if there's nothing to stretch
         if type(options.input) == ReadSTDIN and stdin.isatty():
             parser.print_help()
             sys.stderr.write('\n\n[!] Please specify wordlist or pipe to STDIN\n')
             exit(2)
 
-        elif type(options.input) == Spider:
+        if options.connect and (options.hashes or options.evaluate or options.bucket or options.delta):
+            raise ServerError('--connect only writes candidates (not with --hashes, --evaluate, --bucket or --delta)')
+
+        if options.url_list:
+            if type(options.input) != ReadFile:
+                raise InputListError('--url-list needs a file of URLs as input')
+            from lib.spider import MultiSpider
+            options.input = MultiSpider(
+                MultiSpider.read_urls(options.input.filename),
+                depth=options.spider_depth,
+                threads=options.spider_threads,
+                delay=options.spider_delay,
+            )
+
+        checkpoint = None
+        if options.checkpoint:
+            if options.hashes or options.evaluate or options.connect:
+                raise CheckpointError('--checkpoint only works when writing candidates')
+            from lib.checkpoint import Checkpoint
+            checkpoint = Checkpoint(options.checkpoint, flags=checkpoint_flags(options))
+            if options.resume:
+                checkpoint.load()
+        elif options.resume:
+            raise CheckpointError('Please specify the checkpoint file with --checkpoint')
+
+        # websites need to be crawled first
+        # (read_uri() only imports lib.spider for URLs)
+        if hasattr(options.input, 'start'):
             options.input.depth = options.spider_depth
-            options.input.start()
+            crawl(options.input, checkpoint)
 
-        stretcher(options)
+        if options.connect:
+            connect(options)
+        else:
+            stretcher(options, checkpoint)
 
     except BrokenPipeError:
         # Python flushes standard streams on exit; redirect remaining output
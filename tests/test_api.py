@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+import sys
+import asyncio
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.mangler import Mangler
+from lib.errors import InputListError
+from lib.api import Config, candidates, batches, abatches
+
+
+def test_input_types(tmp_path):
+
+    filename = tmp_path / 'words.txt'
+    filename.write_text('password\nadmin\npassword\n')
+
+    expected = list(candidates(Config(filename, leet=True)))
+    assert expected
+    assert list(candidates(Config(['password', 'admin'], leet=True))) == expected
+    assert list(candidates(Config([b'password', b'admin'], leet=True))) == expected
+    assert list(candidates(Config(Mangler.read_input([b'password', b'admin']), leet=True))) == expected
+
+
+def test_wordlist_cap():
+    '''
+    a Wordlist gets the basic cap mutations like any other input
+    '''
+
+    expected = [b'password', b'PASSWORD', b'Password']
+    assert list(candidates(Config([b'password'], cap=True))) == expected
+    assert list(candidates(Config(Mangler.read_input([b'password']), cap=True))) == expected
+    assert list(candidates(Config(Mangler.read_input([b'password'], cap=True), cap=True))) == expected
+
+    # can't be undone
+    with pytest.raises(InputListError):
+        list(candidates(Config(Mangler.read_input([b'password'], cap=True))))
+
+
+def test_batches():
+
+    config = Config(['password', 'admin'], leet=True, pend=True, limit='10K')
+    words = list(candidates(config))
+    assert [w for batch in batches(config, size=1000) for w in batch] == words
+    assert b''.join(batches(config, size=1000, join=True)) == b''.join(w + b'\n' for w in words)
+
+
+@pytest.mark.parametrize('join', [False, True])
+def test_abatches(join):
+
+    config = Config(['password', 'admin'], leet=True, pend=True, limit='10K')
+
+    async def collect():
+        return [batch async for batch in abatches(config, size=1000, join=join)]
+
+    expected = list(batches(config, size=1000, join=join))
+    assert len(expected) > 1
+    assert asyncio.run(collect()) == expected
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+'''
+--adaptive should land closer to --limit than the fixed limits from set_output_size()
+'''
+
+import sys
+import random
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.mangler import Mangler
+
+# allowed distance from --limit (or from what's possible, if that's less)
+tolerance = 0.01
+
+
+@pytest.fixture(scope='module')
+def words():
+    '''
+    short words with few leet candidates, long ones with many
+    '''
+
+    random.seed(0)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return [''.join(random.choices(letters, k=random.randint(3, 12))).encode() for _ in range(3000)]
+
+
+def count(words, **kwargs):
+
+    return sum(1 for word in Mangler(list(words), **kwargs))
+
+
+@pytest.mark.parametrize('limit', [5000, 15000, 20000])
+def test_leet(words, limit):
+
+    baseline = count(words, output_size=limit, leet=True)
+    adaptive = count(words, output_size=limit, leet=True, adaptive=True)
+
+    assert limit * (1 - tolerance) <= adaptive <= limit
+    assert abs(adaptive - limit) <= abs(baseline - limit)
+
+
+def test_leet_not_enough_variants(words):
+    '''
+    when the limit can't be reached, the output should still be close to what's possible
+    (words which filled their quota early on can't be topped up later)
+    '''
+
+    baseline = count(words, output_size=25000, leet=True)
+    adaptive = count(words, output_size=25000, leet=True, adaptive=True)
+
+    assert baseline < 25000
+    assert adaptive >= baseline * (1 - 5 * tolerance)
+
+
+@pytest.mark.parametrize('limit', [50000, 200000])
+def test_leet_pend(words, limit):
+
+    adaptive = count(words, output_size=limit, leet=True, pend=True, adaptive=True)
+    assert limit * (1 - tolerance) <= adaptive <= limit
+
+
+def test_max_length(words):
+    '''
+    words which are too long don't take up any of the budget
+
+    words at --max-length can't be pended, and there's no way of knowing that
+    before they come up (the input is sorted by length), so this one is further off
+    '''
+
+    adaptive = count(words, output_size=20000, leet=True, pend=True, max_length=9, adaptive=True)
+    assert 20000 * (1 - 10 * tolerance) <= adaptive <= 20000
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+'''
+interrupted + resumed runs should produce exactly the same output
+as an uninterrupted run
+'''
+
+import sys
+import json
+import time
+import signal
+import threading
+import itertools
+import subprocess
+import urllib.parse
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+stretcher = Path(__file__).resolve().parent.parent / 'stretcher.py'
+
+
+@pytest.fixture
+def wordlist(tmp_path):
+
+    syllables = ['pass', 'word', 'sun', 'shine', 'dragon', 'mon', 'key', 'star', 'blue', 'ro']
+    words = [''.join(w) for w in itertools.product(syllables, repeat=3)]
+    filename = tmp_path / 'words.txt'
+    filename.write_text('\n'.join(words) + '\n')
+    return filename
+
+
+def run(args, stdout=subprocess.DEVNULL):
+
+    return subprocess.run([sys.executable, str(stretcher)] + args, stdout=stdout, stderr=subprocess.DEVNULL)
+
+
+def interrupt(args, outputs, stdout=subprocess.DEVNULL, sig=signal.SIGTERM):
+    '''
+    starts a run, sends it a signal once some output has been written
+    '''
+
+    process = subprocess.Popen([sys.executable, str(stretcher)] + args, stdout=stdout, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 60
+        while sum(o.stat().st_size for o in outputs if o.exists()) < 100000:
+            assert process.poll() is None, 'finished before it could be interrupted'
+            assert time.time() < deadline, 'no output'
+            time.sleep(.01)
+        process.send_signal(sig)
+        return process.wait(timeout=30)
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+
+@pytest.mark.parametrize('sig', [signal.SIGTERM, signal.SIGINT])
+def test_stdout(tmp_path, wordlist, sig):
+
+    args = ['-i', str(wordlist), '--leet', '--capswap', '--pend', '--limit', '2M']
+    reference = tmp_path / 'reference.txt'
+    output = tmp_path / 'output.txt'
+    checkpoint = tmp_path / 'job.ckpt'
+
+    with open(reference, 'wb') as f:
+        run(args, stdout=f)
+
+    with open(output, 'wb') as f:
+        interrupt(args + ['--checkpoint', str(checkpoint)], [output], stdout=f, sig=sig)
+    assert checkpoint.exists()
+    assert output.stat().st_size < reference.stat().st_size
+
+    with open(output, 'ab') as f:
+        assert run(args + ['--checkpoint', str(checkpoint), '--resume'], stdout=f).returncode == 0
+
+    assert output.read_bytes() == reference.read_bytes()
+    assert not checkpoint.exists()
+
+
+def test_stdout_truncated(tmp_path, wordlist):
+    '''
+    anything written after the last checkpoint (e.g. if the process was killed) is discarded
+    '''
+
+    args = ['-i', str(wordlist), '--leet', '--capswap', '--pend', '--limit', '2M']
+    reference = tmp_path / 'reference.txt'
+    output = tmp_path / 'output.txt'
+    checkpoint = tmp_path / 'job.ckpt'
+
+    with open(reference, 'wb') as f:
+        run(args, stdout=f)
+
+    with open(output, 'wb') as f:
+        interrupt(args + ['--checkpoint', str(checkpoint)], [output], stdout=f)
+    with open(output, 'ab') as f:
+        f.write(b'partial\nlines\nfrom\na\ncrash')
+        f.flush()
+        assert run(args + ['--checkpoint', str(checkpoint), '--resume'], stdout=f).returncode == 0
+
+    assert output.read_bytes() == reference.read_bytes()
+
+
+def test_adaptive(tmp_path, wordlist):
+
+    args = ['-i', str(wordlist), '--leet', '--capswap', '--pend', '--limit', '2M', '--adaptive', '-M', '16']
+    reference = tmp_path / 'reference.txt'
+    output = tmp_path / 'output.txt'
+    checkpoint = tmp_path / 'job.ckpt'
+
+    with open(reference, 'wb') as f:
+        run(args, stdout=f)
+
+    with open(output, 'wb') as f:
+        interrupt(args + ['--checkpoint', str(checkpoint)], [output], stdout=f)
+    assert checkpoint.exists()
+
+    with open(output, 'ab') as f:
+        assert run(args + ['--checkpoint', str(checkpoint), '--resume'], stdout=f).returncode == 0
+
+    assert output.read_bytes() == reference.read_bytes()
+
+
+def test_buckets(tmp_path, wordlist):
+
+    reference = [tmp_path / f'reference_{i}.txt' for i in range(3)]
+    output = [tmp_path / f'output_{i}.txt' for i in range(3)]
+    checkpoint = tmp_path / 'job.ckpt'
+
+    def args(files):
+        return ['-i', str(wordlist), '--leet', '--capswap', '--pend', '--limit', '2M',
+            '--bucket', f'1-11:{files[0]}', '--bucket', f'12-14:{files[1]}', '--bucket', f'13-:{files[2]}']
+
+    run(args(reference))
+
+    interrupt(args(output) + ['--checkpoint', str(checkpoint)], output)
+    assert checkpoint.exists()
+    assert run(args(output) + ['--checkpoint', str(checkpoint), '--resume']).returncode == 0
+
+    for r, o in zip(reference, output):
+        assert o.read_bytes() == r.read_bytes()
+
+
+def test_options_must_match(tmp_path, wordlist):
+
+    args = ['-i', str(wordlist), '--leet', '--capswap', '--pend', '--limit', '2M']
+    output = tmp_path / 'output.txt'
+    checkpoint = tmp_path / 'job.ckpt'
+
+    with open(output, 'wb') as f:
+        interrupt(args + ['--checkpoint', str(checkpoint)], [output], stdout=f)
+    assert run(args + ['--double', '--checkpoint', str(checkpoint), '--resume']).returncode != 0
+
+
+def test_stops_without_output(tmp_path, wordlist):
+    '''
+    a stop request is handled even when nothing passes the length filter
+    '''
+
+    checkpoint = tmp_path / 'job.ckpt'
+    process = subprocess.Popen([sys.executable, str(stretcher), '-i', str(wordlist), '-C', '-p', '--limit', '50M', '-m', '40', '--checkpoint', str(checkpoint)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        time.sleep(2)
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=10)
+    finally:
+        if process.poll() is None:
+            process.kill()
+    assert checkpoint.exists()
+
+
+pages_per_site = 21
+
+
+class SlowSite(BaseHTTPRequestHandler):
+    '''
+    an index page linking to p1..p20, each with its own word
+    '''
+
+    def log_message(self, *args):
+        pass
+
+
+    def do_GET(self):
+
+        time.sleep(.1)
+        page = self.path.strip('/').split('.')[0] or 'index'
+        self.server.requests.append(self.path)
+
+        body = f'<html><body><p>common word{page}</p>'
+        if page == 'index':
+            body += ''.join(f'<a href="/p{i}.html">x</a>' for i in range(1, pages_per_site))
+        body = (body + '</body></html>').encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def site():
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowSite)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize('sig', [signal.SIGTERM, signal.SIGINT])
+@pytest.mark.parametrize('url_list', [False, True])
+def test_crawl(tmp_path, site, sig, url_list):
+    '''
+    an interrupted crawl saves its frontier, and the resumed crawl visits the rest
+    '''
+
+    host, port = site.server_address
+    url = f'http://{host}:{port}/'
+    args = ['-i', url, '--spider-depth', '2']
+    if url_list:
+        urls = tmp_path / 'urls.txt'
+        urls.write_text(url + '\n')
+        args = ['-i', str(urls), '--url-list', '--spider-depth', '2', '--spider-delay', '0']
+    checkpoint = tmp_path / 'job.ckpt'
+
+    reference = run(args, stdout=subprocess.PIPE).stdout
+    assert len(site.requests) == pages_per_site
+    site.requests.clear()
+
+    process = subprocess.Popen([sys.executable, str(stretcher)] + args + ['--checkpoint', str(checkpoint)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 30
+        while len(site.requests) < 5:
+            assert process.poll() is None, 'finished before it could be interrupted'
+            assert time.time() < deadline, 'no requests'
+            time.sleep(.01)
+        process.send_signal(sig)
+        assert process.wait(timeout=30) != 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+    state = json.loads(checkpoint.read_text())['spider']
+    assert 0 < len(state['visited']) < pages_per_site
+    assert len(state['visited']) + len(state['frontier']) == pages_per_site
+    before = list(site.requests)
+
+    resumed = run(args + ['--checkpoint', str(checkpoint), '--resume'], stdout=subprocess.PIPE)
+    assert resumed.returncode == 0
+    assert resumed.stdout == reference
+    assert not checkpoint.exists()
+
+    # every page was visited, and the pages in the checkpoint weren't visited again
+    visited = {urllib.parse.urlparse(u).path for u in state['visited']}
+    assert visited <= set(before)
+    after = site.requests[len(before):]
+    assert visited.isdisjoint(after)
+    assert visited | set(after) == {'/'} | {f'/p{i}.html' for i in range(1, pages_per_site)}
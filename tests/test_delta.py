@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+'''
+--delta: a second run over an appended wordlist only stretches the new words
+'''
+
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.delta import Manifest
+from lib.errors import DeltaError
+from lib.mangler import Mangler
+
+stretcher = Path(__file__).resolve().parent.parent / 'stretcher.py'
+
+old_words = ['password', 'summer', 'dragon', 'monkey', 'letmein']
+new_words = ['sunshine', 'starwars', 'iloveyou']
+flags = ['--leet', '--pend']
+
+
+def run(args):
+
+    return subprocess.run([sys.executable, str(stretcher)] + args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def test_round_trip(tmp_path):
+
+    wordlist = tmp_path / 'words.txt'
+    manifest = tmp_path / 'base.delta'
+    wordlist.write_text('\n'.join(old_words) + '\n')
+
+    first = run(['-i', str(wordlist), '--limit', '5K', '--delta', str(manifest)] + flags)
+    assert first.returncode == 0
+    header = json.loads(manifest.read_bytes().splitlines()[0])
+    assert [fname for fname, limit in header['limits']] == ['leet', 'append/prepend']
+
+    with open(wordlist, 'a') as f:
+        f.write('\n'.join(new_words) + '\n')
+
+    # a manifest with the same limits but no words, so everything is "new"
+    reference_manifest = tmp_path / 'reference.delta'
+    reference_manifest.write_bytes(manifest.read_bytes().splitlines()[0] + b'\n')
+    new_only = tmp_path / 'new.txt'
+    new_only.write_text('\n'.join(new_words) + '\n')
+    reference = run(['-i', str(new_only), '--delta', str(reference_manifest)] + flags)
+
+    second = run(['-i', str(wordlist), '--delta', str(manifest)] + flags)
+    assert second.returncode == 0
+    assert b'3 new words since last run' in second.stderr
+    assert b'Reusing per-word limits' in second.stderr
+    assert second.stdout
+    assert second.stdout == reference.stdout
+    # the limits from --limit 5K, not the default ones
+    unlimited = run(['-i', str(new_only)] + flags)
+    assert len(second.stdout) < len(unlimited.stdout)
+    for word in old_words:
+        assert f'\n{word}\n'.encode() not in b'\n' + second.stdout
+    for word in new_words:
+        assert f'\n{word}\n'.encode() in b'\n' + second.stdout
+
+    # every word is now in the manifest
+    assert set(manifest.read_bytes().splitlines()[1:]) == {w.encode() for w in old_words + new_words}
+    third = run(['-i', str(wordlist), '--delta', str(manifest)] + flags)
+    assert third.returncode == 0
+    assert third.stdout == b''
+
+
+def test_changed_flags(tmp_path):
+
+    wordlist = tmp_path / 'words.txt'
+    manifest = tmp_path / 'base.delta'
+    wordlist.write_text('\n'.join(old_words) + '\n')
+    assert run(['-i', str(wordlist), '--delta', str(manifest)] + flags).returncode == 0
+    before = manifest.read_bytes()
+
+    changed = run(['-i', str(wordlist), '--delta', str(manifest), '--leet'])
+    assert changed.returncode == 1
+    assert b'Options differ' in changed.stderr
+    assert manifest.read_bytes() == before
+
+
+def test_changed_mutators(tmp_path):
+
+    manifest = tmp_path / 'base.delta'
+    words = [w.encode() for w in old_words]
+    Manifest(manifest, flags={}).write(Mangler(words, leet=True, pend=True))
+
+    with pytest.raises(DeltaError, match='Mutators differ'):
+        Manifest(manifest, flags={}).apply(Mangler(words, leet=True))
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+import sys
+import hashlib
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.hasher import Hasher, ntlm
+
+
+def test_ntlm():
+
+    assert ntlm(b'password').hex() == '8846f7eaee8fb117ad06bdd830b7586c'
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_stops_when_all_cracked(tmp_path, processes):
+
+    filename = tmp_path / 'hashes.txt'
+    filename.write_text('\n'.join([
+        'alice:' + hashlib.md5(b'summer1').hexdigest(),
+        'bob:' + hashlib.md5(b'dragon').hexdigest(),
+    ]) + '\n')
+
+    generated = []
+    def candidates():
+        for i in range(1000000):
+            word = f'word{i}'.encode()
+            if i == 15000:
+                word = b'summer1'
+            elif i == 25000:
+                word = b'dragon'
+            generated.append(word)
+            yield word
+
+    hasher = Hasher(filename, hash_type='md5', processes=processes, batch_size=1000)
+    hits = dict((plain, _hash) for _hash, plain in hasher.crack(candidates()))
+
+    assert hits == {b'summer1': hashlib.md5(b'summer1').hexdigest(), b'dragon': hashlib.md5(b'dragon').hexdigest()}
+    assert not hasher.targets
+    # nowhere near the whole stream
+    assert len(generated) < 100000
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+'''
+a model should only change the order of leet and capswap variants
+'''
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.model import Model
+from lib.mangler import Mangler
+
+words = [b'password', b'letmein', b'blackbird', b'summertime']
+cracked = ['P@ssword', 'p4ssw0rd', 'L3tmein', '1etmein', 'BlackBird', 'b1ackbird', '5ummer7ime', 'Summertime']
+
+
+def trained():
+
+    model = Model()
+    for password in cracked:
+        model.learn(password)
+    return model
+
+
+def candidates(model=None, limit=None):
+
+    return [word for word in Mangler(words, output_size=limit, leet=True, capswap=True, model=model)]
+
+
+def test_same_candidates():
+
+    model = trained()
+
+    default = candidates()
+    ranked = candidates(model=model)
+
+    assert set(ranked) == set(default)
+    assert len(ranked) == len(default)
+    # no substitutions beyond the default table
+    assert b'1etmein' not in ranked
+    assert b'p4ssword' not in ranked
+
+
+def test_order():
+
+    model = trained()
+
+    default = [word for word in Mangler([b'password'], leet=True)]
+    ranked = [word for word in Mangler([b'password'], leet=True, model=model)]
+    assert set(ranked) == set(default)
+    # learned substitutions come first
+    assert ranked.index(b'p@ssword') < ranked.index(b'pa5sword')
+    assert ranked.index(b'passw0rd') < ranked.index(b'pa5sword')
+    assert default.index(b'p@ssword') > default.index(b'pa5sword')
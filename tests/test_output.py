@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+'''
+length buckets (--bucket)
+'''
+
+import os
+import sys
+import time
+import signal
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.errors import CheckpointError
+from lib.output import parse_bucket, BucketWriter
+
+
+@pytest.mark.parametrize('s,bucket', [
+    ('1-7:short.txt', (1, 7, 'short.txt')),
+    ('11-:long.txt', (11, None, 'long.txt')),
+    ('-6:tiny.txt', (None, 6, 'tiny.txt')),
+    ('8:eight.txt', (8, 8, 'eight.txt')),
+    ('8-10:/tmp/a:b', (8, 10, '/tmp/a:b')),
+])
+def test_parse_bucket(s, bucket):
+
+    assert parse_bucket(s) == bucket
+
+
+@pytest.mark.parametrize('s', ['short.txt', '1-7:', 'a-7:short.txt', 'x:short.txt', '1-b:short.txt'])
+def test_parse_bucket_invalid(s):
+
+    with pytest.raises(ValueError, match='Invalid bucket'):
+        parse_bucket(s)
+
+
+def test_routing(tmp_path):
+
+    paths = [tmp_path / f'{i}.txt' for i in range(3)]
+    buckets = BucketWriter([(3, 5, paths[0]), (5, 7, paths[1]), (10, None, paths[2])], buffer_size=16)
+    assert buckets.min_length == 3
+    assert buckets.max_length is None
+
+    words = [b'ab', b'abc', b'abcde', b'abcdef', b'abcdefgh', b'abcdefghij', b'abcdefghijklmnop'] * 10
+    # "abcde" fits in two buckets
+    assert [buckets.write(w) for w in words[:7]] == [0, 1, 2, 1, 0, 1, 1]
+    for word in words[7:]:
+        buckets.write(word)
+    buckets.close()
+
+    assert paths[0].read_bytes() == b'abc\nabcde\n' * 10
+    assert paths[1].read_bytes() == b'abcde\nabcdef\n' * 10
+    assert paths[2].read_bytes() == b'abcdefghij\nabcdefghijklmnop\n' * 10
+    assert buckets.written == [20, 20, 20]
+    assert buckets.sizes == [p.stat().st_size for p in paths]
+
+
+def test_length_bounds(tmp_path):
+
+    buckets = BucketWriter([(None, 7, tmp_path / 'a'), (8, 12, tmp_path / 'b')])
+    assert buckets.min_length is None
+    assert buckets.max_length == 12
+    buckets.close()
+
+
+class ShortWrites():
+    '''
+    a file which writes at most 3 bytes at a time
+    '''
+
+    def __init__(self, f):
+
+        self.f = f
+
+
+    def write(self, data):
+
+        return self.f.write(data[:3])
+
+
+def test_short_writes(tmp_path):
+
+    path = tmp_path / 'out.txt'
+    buckets = BucketWriter([(None, None, path)], buffer_size=64)
+    buckets.files[0] = ShortWrites(buckets.files[0])
+    words = [f'word{i}'.encode() for i in range(100)]
+    for word in words:
+        buckets.write(word)
+    buckets.flush()
+    buckets.files[0].f.close()
+
+    assert path.read_bytes() == b''.join(w + b'\n' for w in words)
+    assert buckets.sizes[0] == path.stat().st_size
+
+
+def test_fifo_with_signals(tmp_path):
+    '''
+    a slow reader plus a steady stream of signals causes short writes to the FIFO
+    '''
+
+    fifo = tmp_path / 'fifo'
+    os.mkfifo(fifo)
+    received = bytearray()
+
+    def reader():
+        with open(fifo, 'rb', buffering=0) as f:
+            while True:
+                time.sleep(.001)
+                data = f.read(4096)
+                if not data:
+                    break
+                received.extend(data)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+
+    handler = signal.signal(signal.SIGALRM, lambda signum, frame: None)
+    signal.setitimer(signal.ITIMER_REAL, .005, .005)
+    try:
+        buckets = BucketWriter([(None, None, fifo)])
+        words = [f'password{i}'.encode() for i in range(200000)]
+        for word in words:
+            buckets.write(word)
+        buckets.close()
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, handler)
+    thread.join()
+
+    assert received == b''.join(w + b'\n' for w in words)
+    assert buckets.sizes[0] == len(received)
+
+
+def test_resume(tmp_path):
+
+    path = tmp_path / 'out.txt'
+    path.write_bytes(b'one\ntwo\nthree\n')
+    buckets = BucketWriter([(None, None, path)], resume=[(2, 8)])
+    buckets.write(b'four')
+    buckets.close()
+
+    assert path.read_bytes() == b'one\ntwo\nfour\n'
+    assert buckets.written == [3]
+    assert buckets.sizes == [13]
+
+
+def test_resume_short_file(tmp_path):
+
+    path = tmp_path / 'out.txt'
+    path.write_bytes(b'one\n')
+    with pytest.raises(CheckpointError, match='shorter than the checkpoint'):
+        BucketWriter([(None, None, path)], resume=[(2, 8)])
+    # not padded
+    assert path.read_bytes() == b'one\n'
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+'''
+runs stretcher.py --serve and talks to it like --connect does
+'''
+
+import os
+import sys
+import time
+import random
+import threading
+import subprocess
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.errors import ServerError
+from lib.server import request_candidates
+
+stretcher = Path(__file__).resolve().parent.parent / 'stretcher.py'
+
+
+@pytest.fixture(scope='module')
+def files(tmp_path_factory):
+
+    tmp_path = tmp_path_factory.mktemp('server')
+    random.seed(0)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+
+    small = tmp_path / 'small.txt'
+    small.write_text('\n'.join(['password', 'summer', 'dragon', 'monkey', 'letmein']) + '\n')
+
+    large = tmp_path / 'large.txt'
+    with open(large, 'w') as f:
+        for i in range(2000000):
+            f.write(''.join(random.choices(letters, k=8)) + f'{i}\n')
+
+    return tmp_path, small, large
+
+
+@pytest.fixture(scope='module')
+def server(files):
+
+    tmp_path = files[0]
+    socket_path = str(tmp_path / 'stretcher.sock')
+    process = subprocess.Popen([sys.executable, str(stretcher), '--serve', socket_path], stderr=subprocess.DEVNULL)
+    while not os.path.exists(socket_path):
+        assert process.poll() is None
+        time.sleep(.01)
+
+    yield socket_path
+
+    process.terminate()
+    process.wait()
+
+
+def candidates(socket_path, spec):
+
+    return b''.join(request_candidates(socket_path, spec))
+
+
+def test_same_as_cli(server, files):
+
+    small = files[1]
+    args = ['-i', str(small), '--leet', '--capswap', '--pend', '--limit', '20K']
+    cli = subprocess.run([sys.executable, str(stretcher)] + args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+    connect = subprocess.run([sys.executable, str(stretcher), '--connect', server] + args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+
+    assert cli
+    assert connect == cli
+    assert candidates(server, {'input': str(small), 'leet': True, 'capswap': True, 'pend': True, 'limit': '20K'}) == cli
+
+
+@pytest.mark.parametrize('spec', [
+    {'limit': 'lots'},
+    {'permutations': 'x'},
+    {'leet': 1},
+    {'min_length': '8'},
+    {'shard': [3, 2]},
+    {'shard': 'x'},
+    {'unknown': True},
+])
+def test_invalid_spec(server, files, spec):
+
+    spec['input'] = str(files[1])
+    with pytest.raises(ServerError, match='Invalid|Unknown'):
+        candidates(server, spec)
+
+
+def test_missing_file(server, files):
+
+    with pytest.raises(ServerError, match='Cannot find'):
+        candidates(server, {'input': str(files[0] / 'missing.txt')})
+
+
+def test_cold_job_doesnt_block(server, files):
+    '''
+    a small job finishes before a large job has finished reading its wordlist
+    '''
+
+    tmp_path, small, large = files
+    done = dict()
+
+    def large_job():
+        chunks = request_candidates(server, {'input': str(large), 'limit': 10})
+        next(chunks)
+        done['large'] = time.time()
+        for chunk in chunks:
+            pass
+
+    thread = threading.Thread(target=large_job)
+    thread.start()
+    time.sleep(.1)
+
+    assert candidates(server, {'input': str(small), 'leet': True})
+    done['small'] = time.time()
+
+    thread.join()
+    assert done['small'] < done['large']
+
+
+@pytest.mark.parametrize('flags', [['--hashes', 'hashes.txt'], ['--evaluate', 'known.txt'], ['--bucket', '1-7:short.txt'], ['--delta', 'base.delta']])
+def test_connect_only_writes_candidates(server, files, flags):
+
+    tmp_path, small = files[:2]
+    process = subprocess.run([sys.executable, str(stretcher), '--connect', server, '-i', str(small)] + flags,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=tmp_path)
+    assert process.returncode == 1
+    assert process.stdout == b''
+    assert b'--connect only writes candidates' in process.stderr
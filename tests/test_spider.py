@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+
+# by TheTechromancer
+
+'''
+crawls several local http.server instances
+'''
+
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+from collections import defaultdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lib.errors import SpiderError
+from lib.utils import url_to_domain
+from lib.spider import Spider, MultiSpider
+
+pages_per_site = 6
+# url_to_domain() keeps the last two parts of the hostname,
+# so these are four separate domains...
+site_hosts = ['127.0.0.2', '127.0.0.3', '127.0.0.4', '127.0.0.5']
+# ...and these are two hosts in the same one
+sibling_hosts = ['127.1.0.7', '127.2.0.7']
+
+
+class Handler(BaseHTTPRequestHandler):
+    '''
+    each site: an index page linking to p1..pN, each of which links back to the index
+    every page contains "common", its site name and its page name once
+    '''
+
+    def log_message(self, *args):
+        pass
+
+
+    def do_GET(self):
+
+        server = self.server
+        with server.lock:
+            server.active[server.domain] += 1
+            server.max_active[server.domain] = max(server.max_active[server.domain], server.active[server.domain])
+            start = time.time()
+
+        time.sleep(.02)
+
+        page = self.path.strip('/').split('.')[0] or 'index'
+        body = f'<html><body><p>common {server.name} page{page}</p>'
+        if page == 'index':
+            body += ''.join(f'<a href="/p{i}.html">x</a>' for i in range(1, pages_per_site))
+            # other domains are out of scope
+            body += f'<a href="{server.other}/unreachable.html">x</a>'
+        else:
+            body += '<a href="/">x</a>'
+        body = (body + '</body></html>').encode()
+
+        # before responding, so it's logged by the time the spider finishes
+        with server.lock:
+            server.active[server.domain] -= 1
+            server.requests[server.domain].append((start, time.time()))
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture(scope='module')
+def servers():
+
+    lock = threading.Lock()
+    active = defaultdict(int)
+    max_active = defaultdict(int)
+    requests = defaultdict(list)
+
+    servers = []
+    for i, host in enumerate(site_hosts + sibling_hosts):
+        server = ThreadingHTTPServer((host, 0), Handler)
+        server.name = f'site{i}'
+        server.domain = url_to_domain(f'http://{host}/')
+        server.lock, server.active, server.max_active, server.requests = lock, active, max_active, requests
+        servers.append(server)
+
+    for i, server in enumerate(servers):
+        server.other = url(servers[(i+1) % len(site_hosts)])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    yield servers
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def url(server):
+
+    host, port = server.server_address
+    return f'http://{host}:{port}/'
+
+
+def reset(servers):
+
+    stats = servers[0]
+    stats.active.clear()
+    stats.max_active.clear()
+    stats.requests.clear()
+
+
+def test_merged_counts(servers):
+
+    sites = servers[:len(site_hosts)]
+    spider = MultiSpider([url(s) for s in sites], depth=2, threads=8, delay=0)
+    spider.start()
+
+    assert len(spider.visited) == len(sites) * pages_per_site
+    assert spider.parser.words['common'] == len(sites) * pages_per_site
+    for server in sites:
+        assert spider.parser.words[server.name] == pages_per_site
+    assert spider.parser.words['pageindex'] == len(sites)
+    # out of scope
+    assert 'unreachable.html' not in ' '.join(spider.visited)
+
+    # most frequent first
+    counts = [spider.parser.words[w.decode()] for w in spider]
+    assert counts == sorted(counts, reverse=True)
+    assert len(counts) == len(spider.parser.words)
+
+
+def test_one_request_per_domain(servers):
+
+    reset(servers)
+    siblings = servers[len(site_hosts):]
+    delay = .1
+    spider = MultiSpider([url(s) for s in servers], depth=2, threads=8, delay=delay)
+    spider.start()
+
+    stats = servers[0]
+    # two hosts, one domain
+    sibling_domain = siblings[0].domain
+    assert siblings[1].domain == sibling_domain
+    assert len(stats.requests[sibling_domain]) == 2 * pages_per_site
+
+    for domain, requests in stats.requests.items():
+        assert stats.max_active[domain] == 1
+        requests.sort()
+        for (_, end), (start, _) in zip(requests, requests[1:]):
+            assert start - end >= delay - .01
+
+    # the pool is shared, so several domains are crawled at once
+    starts = sorted(start for requests in stats.requests.values() for start, end in requests)
+    assert len(starts) == len(servers) * pages_per_site
+    assert starts[-1] - starts[0] < len(starts) * delay
+
+
+@pytest.mark.parametrize('threads', [1, 8])
+def test_state_restore(servers, threads):
+
+    urls = [url(s) for s in servers]
+    full = MultiSpider(urls, depth=2, threads=threads, delay=0)
+    full.start()
+
+    class Stop(Exception):
+        pass
+
+    saved = dict()
+    def checkpoint(spider):
+        # through JSON, like a checkpoint file
+        saved['state'] = json.loads(json.dumps(spider.state()))
+        if len(spider.visited) == 10:
+            raise Stop
+
+    spider = MultiSpider(urls, depth=2, threads=threads, delay=0)
+    with pytest.raises(Stop):
+        spider.start(checkpoint=checkpoint)
+    assert saved['state']['frontier']
+
+    resumed = MultiSpider(urls, depth=2, threads=threads, delay=0)
+    resumed.restore(saved['state'])
+    resumed.start()
+
+    assert resumed.visited == full.visited
+    assert resumed.parser.words == full.parser.words
+
+
+def test_single_site_state_restore(servers):
+
+    full = Spider(url(servers[0]), depth=2)
+    full.start()
+
+    saved = dict()
+    class Stop(Exception):
+        pass
+    def checkpoint(spider):
+        saved['state'] = json.loads(json.dumps(spider.state()))
+        if len(spider.visited) == 3:
+            raise Stop
+
+    spider = Spider(url(servers[0]), depth=2)
+    with pytest.raises(Stop):
+        spider.start(checkpoint=checkpoint)
+
+    resumed = Spider(url(servers[0]), depth=2)
+    resumed.restore(saved['state'])
+    resumed.start()
+
+    assert resumed.visited == full.visited
+    assert list(resumed) == list(full)
+
+
+def test_unreachable_site(servers):
+
+    spider = MultiSpider([url(servers[0]), 'http://127.0.0.1:1/'], depth=2, threads=4, delay=0)
+    spider.start()
+    assert spider.errors == 1
+    assert len(spider.visited) == pages_per_site
+
+
+def test_read_urls(tmp_path):
+
+    filename = tmp_path / 'urls.txt'
+    filename.write_text('# scope\nhttp://127.0.0.2/\n\nhttps://127.0.0.3/\n')
+    assert MultiSpider.read_urls(filename) == ['http://127.0.0.2/', 'https://127.0.0.3/']
+
+    filename.write_text('http://127.0.0.2/\npassword\n')
+    with pytest.raises(SpiderError):
+        MultiSpider.read_urls(filename)